@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AuditLog, DeliverySetting
+from .models import AuditLog, DeliverySetting, IdempotencyKey
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
@@ -13,3 +13,9 @@ class DeliverySettingAdmin(admin.ModelAdmin):
     list_display = ("key", "value", "updated_at")
     search_fields = ("key", "value")
     readonly_fields = ("updated_at",)
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("key", "user", "status_code", "created_at", "expires_at")
+    search_fields = ("key", "user__username")
+    readonly_fields = ("created_at",)
@@ -0,0 +1,121 @@
+import functools
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_key(user_id, key):
+    return f"idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def _stored_response(user_id, key, cache_key):
+    stored = cache.get(cache_key)
+    if stored is not None:
+        return stored
+    # Redis may have evicted the entry; the database copy lives for the same TTL.
+    now = timezone.now()
+    record = IdempotencyKey.objects.filter(user_id=user_id, key=key, expires_at__gt=now).first()
+    if record is None:
+        return None
+    stored = {"request_hash": record.request_hash, "status": record.status_code, "body": record.response_body}
+    cache.set(cache_key, stored, timeout=max(1, int((record.expires_at - now).total_seconds())))
+    return stored
+
+
+def _replay(stored, fingerprint):
+    if stored["request_hash"] != fingerprint:
+        return Response(
+            {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(stored["body"], status=stored["status"], headers={REPLAYED_HEADER: "true"})
+
+
+def idempotent(method):
+    """Replay the stored response when a client retries a view method with the same ``Idempotency-Key``.
+
+    The response is recorded in the same transaction as the view's writes and
+    cached in Redis for ``IDEMPOTENCY_TTL_SECONDS``; replays never reach the
+    view. A duplicate arriving while the first request is still running gets
+    409. Exceptions and 5xx responses are not recorded, so they can be retried.
+    """
+
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return method(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        user_id = request.user.id
+        cache_key = _cache_key(user_id, key)
+        fingerprint = request_fingerprint(request)
+        stored = _stored_response(user_id, key, cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        lock_key = f"{cache_key}:lock"
+        if not cache.add(lock_key, 1, timeout=settings.IDEMPOTENCY_LOCK_SECONDS):
+            return Response(
+                {"detail": f"A request with this {IDEMPOTENCY_HEADER} is already in progress."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            # The first request may have finished between the lookup and taking the lock.
+            stored = _stored_response(user_id, key, cache_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            # An expired record the purge task has not reached yet would still hold the unique (user, key) slot.
+            IdempotencyKey.objects.filter(user_id=user_id, key=key, expires_at__lte=timezone.now()).delete()
+            try:
+                with transaction.atomic():
+                    response = method(view, request, *args, **kwargs)
+                    if response.status_code >= 500:
+                        return response
+                    record = IdempotencyKey.objects.create(
+                        user_id=user_id,
+                        key=key,
+                        request_hash=fingerprint,
+                        status_code=response.status_code,
+                        response_body=response.data,
+                        expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                    )
+            except IntegrityError:
+                # Lost a race after the lock expired; the winner's writes stand and ours were rolled back.
+                stored = _stored_response(user_id, key, cache_key)
+                if stored is None:
+                    raise
+                return _replay(stored, fingerprint)
+            cache.set(
+                cache_key,
+                {"request_hash": fingerprint, "status": record.status_code, "body": response.data},
+                timeout=settings.IDEMPOTENCY_TTL_SECONDS,
+            )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_deliverysetting_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="deliverysetting",
+            name="key",
+            field=models.CharField(
+                choices=[("DELIVERY_FEE_FLAT", "Delivery fee flat"), ("RATE_CARD", "Rate card")],
+                max_length=64,
+                unique=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="deliverysetting",
+            name="value",
+            field=models.TextField(blank=True),
+        ),
+    ]
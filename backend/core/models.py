@@ -1,5 +1,10 @@
 from django.conf import settings
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .settings_cache import bump_settings_version
 
 
 class AuditLog(models.Model):
@@ -28,9 +33,10 @@ class AuditLog(models.Model):
 class DeliverySetting(models.Model):
     class Keys(models.TextChoices):
         DELIVERY_FEE_FLAT = "DELIVERY_FEE_FLAT", "Delivery fee flat"
+        RATE_CARD = "RATE_CARD", "Rate card"
 
     key = models.CharField(max_length=64, choices=Keys.choices, unique=True)
-    value = models.CharField(max_length=255, blank=True)
+    value = models.TextField(blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -38,3 +44,27 @@ class DeliverySetting(models.Model):
 
     def __str__(self) -> str:
         return f"{self.key}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored response for a client-supplied ``Idempotency-Key``, replayed on retries until ``expires_at``."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "key"], name="idempotency_user_key_unique")]
+        indexes = [models.Index(fields=["expires_at"], name="idempotency_expires_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.key} ({self.user_id})"
+
+
+@receiver([post_save, post_delete], sender=DeliverySetting)
+def delivery_setting_changed(sender, **kwargs):
+    transaction.on_commit(bump_settings_version)
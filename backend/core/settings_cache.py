@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_VERSION_KEY = "delivery-settings:version"
+SETTINGS_CHANNEL = "delivery-settings:invalidate"
+
+
+def settings_version():
+    """Stamp of the last ``DeliverySetting`` change; caches compiled from settings compare against it."""
+    return cache.get(SETTINGS_VERSION_KEY, 0)
+
+
+def bump_settings_version():
+    # A fresh timestamp rather than a counter: if the key is evicted, the
+    # next stamp still differs from every version a process has cached.
+    version = time.time_ns()
+    cache.set(SETTINGS_VERSION_KEY, version, timeout=None)
+    get_redis_connection("default").publish(SETTINGS_CHANNEL, version)
+
+
+class DeliverySettingsCache:
+    """All ``DeliverySetting`` values, held in process memory.
+
+    A daemon thread per process listens on ``SETTINGS_CHANNEL`` and drops the
+    cached values when a setting changes. Reads also compare the version
+    counter every ``SETTINGS_CACHE_VERSION_CHECK_SECONDS``, which covers
+    messages missed while the listener was disconnected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        self._version = None
+        self._checked_at = 0.0
+        self._generation = 0
+        self._listener_pid = None
+
+    def values(self):
+        self._ensure_listener()
+        values = self._values
+        if values is not None and time.monotonic() - self._checked_at < settings.SETTINGS_CACHE_VERSION_CHECK_SECONDS:
+            return values
+        with self._lock:
+            version = settings_version()
+            values = self._values
+            if values is not None and version == self._version:
+                self._checked_at = time.monotonic()
+                return values
+            from .models import DeliverySetting
+
+            generation = self._generation
+            values = dict(DeliverySetting.objects.values_list("key", "value"))
+            # A change that landed during the load may not be in these rows:
+            # serve them this once but leave the cache empty so the next read reloads.
+            if generation == self._generation and settings_version() == version:
+                self._values = values
+                self._version = version
+                self._checked_at = time.monotonic()
+            return values
+
+    def get(self, key, default=None):
+        return self.values().get(key, default)
+
+    def invalidate(self):
+        self._generation += 1
+        self._values = None
+
+    def _ensure_listener(self):
+        # Checked by pid so that forked workers start their own listener.
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            threading.Thread(target=self._listen, name="delivery-settings-listener", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(SETTINGS_CHANNEL)
+                # Anything published before the subscription was active is unknown.
+                self.invalidate()
+                for _ in pubsub.listen():
+                    self.invalidate()
+            except Exception:
+                logger.warning("Delivery settings listener disconnected; retrying.", exc_info=True)
+                time.sleep(settings.SETTINGS_CACHE_RETRY_SECONDS)
+
+
+delivery_settings = DeliverySettingsCache()
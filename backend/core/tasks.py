@@ -0,0 +1,10 @@
+from celery import shared_task
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+@shared_task
+def purge_idempotency_keys():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
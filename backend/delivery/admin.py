@@ -1,8 +1,8 @@
 from django.contrib import admin
 from .models import (
     CustomerProfile, RiderProfile, MerchantProfile, MerchantBranch,
-    InventoryItem, Address, Order, OrderItem, OrderTrackingEvent,
-    RiderAvailability, RiderLocation, RiderEarnings, Payment,
+    InventoryItem, Address, Order, OrderItem, StockReservation, OrderTrackingEvent,
+    RiderAvailability, RiderLocation, TrajectoryChunk, RiderEarnings, Payment,
     PaymentTransaction, Notification, ChatMessage
 )
 
@@ -56,6 +56,12 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemInline]
     readonly_fields = ("created_at", "updated_at")
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("order", "inventory_item", "quantity", "status", "expires_at")
+    list_filter = ("status",)
+    readonly_fields = ("created_at",)
+
 @admin.register(OrderTrackingEvent)
 class OrderTrackingEventAdmin(admin.ModelAdmin):
     list_display = ("order", "status", "created_at")
@@ -73,6 +79,12 @@ class RiderLocationAdmin(admin.ModelAdmin):
     list_display = ("rider", "latitude", "longitude", "updated_at")
     readonly_fields = ("updated_at",)
 
+@admin.register(TrajectoryChunk)
+class TrajectoryChunkAdmin(admin.ModelAdmin):
+    list_display = ("rider", "order", "started_at", "ended_at", "point_count", "is_compacted")
+    list_filter = ("is_compacted", "started_at")
+    exclude = ("data",)
+
 @admin.register(RiderEarnings)
 class RiderEarningsAdmin(admin.ModelAdmin):
     list_display = ("rider", "period_start", "period_end", "total_earnings")
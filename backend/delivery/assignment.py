@@ -0,0 +1,42 @@
+from django.db import connection
+from django.utils import timezone
+
+from .models import Order, OrderTrackingEvent
+
+CLAIM_ORDER_SQL = f"""
+WITH claimed AS (
+    UPDATE {Order._meta.db_table}
+    SET rider_id = %(rider_id)s, status = %(assigned)s, updated_at = %(now)s
+    WHERE id = (
+        SELECT id FROM {Order._meta.db_table}
+        WHERE id = %(order_id)s AND status = %(confirmed)s AND rider_id IS NULL
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+), event AS (
+    INSERT INTO {OrderTrackingEvent._meta.db_table} (order_id, status, created_at)
+    SELECT id, %(assigned)s, %(now)s FROM claimed
+    RETURNING id
+)
+SELECT id FROM event
+"""
+
+
+def claim_order(order_id, rider):
+    """Assign an open order to ``rider`` and record the ASSIGNED event in one round trip.
+
+    Returns the new tracking event id, or ``None`` if the order is taken, locked or not open.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            CLAIM_ORDER_SQL,
+            {
+                "order_id": order_id,
+                "rider_id": rider.id,
+                "assigned": Order.Status.ASSIGNED,
+                "confirmed": Order.Status.CONFIRMED,
+                "now": timezone.now(),
+            },
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
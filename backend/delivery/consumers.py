@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from decimal import Decimal, InvalidOperation
+
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from .models import ChatMessage, Order, RiderProfile
+from .tracking import ingest_rider_position
 
-from .models import ChatMessage, Order
+logger = logging.getLogger(__name__)
+
+COORDINATE_STEP = Decimal("0.000001")
 
 
 @database_sync_to_async
@@ -51,6 +61,30 @@ def create_chat_message(order, sender, message):
     )
 
 
+@database_sync_to_async
+def get_rider_id(user):
+    if not user or not user.is_authenticated or user.role != "RIDER":
+        return None
+    return RiderProfile.objects.filter(user=user).values_list("id", flat=True).first()
+
+
+def parse_location_frame(content):
+    """Accept ``[lat, lon]`` or ``{"lat": ..., "lon": ...}``; return quantized Decimals or ``None``."""
+    if isinstance(content, dict):
+        content = (content.get("lat"), content.get("lon"))
+    if not isinstance(content, (list, tuple)) or len(content) != 2:
+        return None
+    try:
+        latitude, longitude = (Decimal(str(value)) for value in content)
+        if not (latitude.is_finite() and longitude.is_finite()):
+            return None
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None
+        return latitude.quantize(COORDINATE_STEP), longitude.quantize(COORDINATE_STEP)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
 class NotificationsConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
         user = self.scope.get("user")
@@ -87,6 +121,9 @@ class OrderTrackingConsumer(AsyncJsonWebsocketConsumer):
     async def tracking_message(self, event):
         await self.send_json(event["payload"])
 
+    async def tracking_position(self, event):
+        await self.send_json(event["payload"])
+
 
 class OrderChatConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
@@ -125,3 +162,44 @@ class OrderChatConsumer(AsyncJsonWebsocketConsumer):
 
     async def chat_message(self, event):
         await self.send_json(event["payload"])
+
+
+class RiderLocationConsumer(AsyncJsonWebsocketConsumer):
+    """Stream of rider GPS frames; only the latest frame per flush interval is persisted."""
+
+    async def connect(self):
+        self.rider_id = await get_rider_id(self.scope.get("user"))
+        if not self.rider_id:
+            await self.close(code=4003)
+            return
+        self.pending = None
+        self.flusher = asyncio.create_task(self.flush_periodically())
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, "flusher"):
+            self.flusher.cancel()
+            await self.flush()
+
+    async def receive_json(self, content, **kwargs):
+        position = parse_location_frame(content)
+        if position:
+            self.pending = position
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(settings.RIDER_LOCATION_SOCKET_FLUSH_SECONDS)
+            await self.flush()
+
+    async def flush(self):
+        # Never raises: a failed write must not kill the flusher while the socket stays open.
+        position, self.pending = self.pending, None
+        if position is None:
+            return
+        try:
+            await database_sync_to_async(ingest_rider_position)(self.rider_id, *position)
+        except Exception:
+            logger.exception("Failed to store position for rider %s.", self.rider_id)
+            # Retry on the next flush unless a newer frame has arrived meanwhile.
+            if self.pending is None:
+                self.pending = position
@@ -0,0 +1,198 @@
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .geo import haversine_matrix, to_radians
+from .geoindex import open_orders
+from .models import Order, OrderTrackingEvent, RiderProfile
+from .outbox import enqueue_order_events
+from .positions import overlay_positions
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (Order.Status.ASSIGNED, Order.Status.PICKED_UP, Order.Status.IN_TRANSIT)
+DISPATCH_LOCK_KEY = "dispatch:running"
+COST_BLOCK_ROWS = 512
+SWAP_BLOCK_SIZE = 512
+
+
+def build_cost_matrix(order_coordinates, rider_coordinates, max_distance_km):
+    """Pickup distance (km) for every order/rider pair; pairs beyond ``max_distance_km`` cost inf."""
+    origins = to_radians(order_coordinates)
+    destinations = to_radians(rider_coordinates)
+    cost = np.empty((len(origins), len(destinations)), dtype=np.float32)
+    for start in range(0, len(origins), COST_BLOCK_ROWS):
+        block = haversine_matrix(origins[start : start + COST_BLOCK_ROWS], destinations)
+        block[~(block <= max_distance_km)] = np.inf
+        cost[start : start + COST_BLOCK_ROWS] = block
+    return cost
+
+
+def solve_assignment(cost, locality=None, improvement_rounds=2):
+    """Match rows (orders) to columns (riders) minimising total cost.
+
+    Greedy phase: every round, assign all pairs that are each other's cheapest
+    remaining option, then drop their rows and columns. The global minimum is
+    always such a pair, so each round makes progress. Improvement phase:
+    pairwise rider swaps between assigned orders that lower the total, tried
+    within blocks of rows that are adjacent in ``locality`` (e.g. latitude).
+    Returns ``(rows, cols)`` index arrays.
+    """
+    cost = np.asarray(cost, dtype=np.float32)
+    row_ids = np.arange(cost.shape[0])
+    col_ids = np.arange(cost.shape[1])
+    work = cost
+    assigned_rows, assigned_cols = [], []
+
+    while work.size:
+        best_col = work.argmin(axis=1)
+        best_row = work.argmin(axis=0)
+        local_rows = np.arange(work.shape[0])
+        mutual = (best_row[best_col] == local_rows) & np.isfinite(work[local_rows, best_col])
+        if not mutual.any():
+            break
+        picked_rows = local_rows[mutual]
+        picked_cols = best_col[mutual]
+        assigned_rows.append(row_ids[picked_rows])
+        assigned_cols.append(col_ids[picked_cols])
+
+        keep_rows = np.ones(work.shape[0], dtype=bool)
+        keep_rows[picked_rows] = False
+        keep_cols = np.ones(work.shape[1], dtype=bool)
+        keep_cols[picked_cols] = False
+        row_ids = row_ids[keep_rows]
+        col_ids = col_ids[keep_cols]
+        work = work[keep_rows][:, keep_cols]
+
+    if not assigned_rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    rows = np.concatenate(assigned_rows)
+    cols = np.concatenate(assigned_cols)
+    if locality is None:
+        locality = np.arange(cost.shape[0])
+    order = np.argsort(np.asarray(locality)[rows], kind="stable")
+    for _ in range(improvement_rounds):
+        if not _improve_by_swaps(cost, rows, cols, order):
+            break
+    return rows, cols
+
+
+def _improve_by_swaps(cost, rows, cols, order):
+    # Only neighbouring pairs are compared, which keeps each gain matrix at
+    # SWAP_BLOCK_SIZE squared instead of assignments squared.
+    improved = False
+    for start in range(0, len(order), SWAP_BLOCK_SIZE):
+        block = order[start : start + SWAP_BLOCK_SIZE]
+        block_rows = rows[block]
+        block_cols = cols[block]
+        current = cost[block_rows, block_cols]
+        crossed = cost[np.ix_(block_rows, block_cols)]
+        gain = current[:, None] + current[None, :] - crossed - crossed.T
+        gain[~np.isfinite(gain)] = 0
+        np.fill_diagonal(gain, 0)
+        used = np.zeros(len(block), dtype=bool)
+        candidates = np.argwhere(np.triu(gain) > 1e-6)
+        if not len(candidates):
+            continue
+        ranked = candidates[np.argsort(-gain[candidates[:, 0], candidates[:, 1]])]
+        for i, j in ranked:
+            if used[i] or used[j]:
+                continue
+            used[i] = used[j] = True
+            cols[block[i]], cols[block[j]] = cols[block[j]], cols[block[i]]
+            improved = True
+    return improved
+
+
+def load_open_orders(limit):
+    return list(
+        Order.objects.filter(
+            status=Order.Status.CONFIRMED,
+            rider__isnull=True,
+            pickup_latitude__isnull=False,
+            pickup_longitude__isnull=False,
+        )
+        .order_by("created_at", "id")
+        .values_list("id", "pickup_latitude", "pickup_longitude")[:limit]
+    )
+
+
+def load_idle_riders(limit):
+    busy = Order.objects.filter(status__in=ACTIVE_STATUSES, rider__isnull=False).values("rider_id")
+    riders = (
+        RiderProfile.objects.filter(availability__is_online=True, kyc_status="VERIFIED")
+        .exclude(id__in=busy)
+        .order_by("id")
+        .values_list("id", "location__latitude", "location__longitude")
+    )
+    return overlay_positions(list(riders))[:limit]
+
+
+def _assign_sql(pair_count):
+    values = ", ".join(["(%s, %s)"] * pair_count)
+    order_table = Order._meta.db_table
+    return f"""
+WITH pairs (order_id, rider_id) AS (VALUES {values}),
+claimed AS (
+    UPDATE {order_table} AS o
+    SET rider_id = pairs.rider_id, status = %s, updated_at = %s
+    FROM pairs
+    WHERE o.id = pairs.order_id
+      AND o.status = %s
+      AND o.rider_id IS NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM {order_table} AS busy
+          WHERE busy.rider_id = pairs.rider_id AND busy.status IN %s
+      )
+    RETURNING o.id
+)
+INSERT INTO {OrderTrackingEvent._meta.db_table} (order_id, status, created_at)
+SELECT id, %s, %s FROM claimed
+RETURNING id, order_id
+"""
+
+
+def assign_pairs(pairs):
+    """Write all (order_id, rider_id) assignments and their ASSIGNED events in one transaction."""
+    if not pairs:
+        return []
+    now = timezone.now()
+    params = [value for pair in pairs for value in pair]
+    params += [Order.Status.ASSIGNED, now, Order.Status.CONFIRMED, tuple(ACTIVE_STATUSES)]
+    params += [Order.Status.ASSIGNED, now]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_assign_sql(len(pairs)), params)
+            events = cursor.fetchall()
+        assigned_order_ids = [order_id for _, order_id in events]
+        enqueue_order_events([event_id for event_id, _ in events])
+        transaction.on_commit(lambda: open_orders.remove(*assigned_order_ids))
+    return assigned_order_ids
+
+
+def run_dispatch():
+    if not cache.add(DISPATCH_LOCK_KEY, 1, timeout=settings.DISPATCH_LOCK_SECONDS):
+        return 0
+    try:
+        orders = load_open_orders(settings.DISPATCH_MAX_BATCH)
+        if not orders:
+            return 0
+        riders = load_idle_riders(settings.DISPATCH_MAX_BATCH)
+        if not riders:
+            return 0
+        cost = build_cost_matrix(
+            [(latitude, longitude) for _, latitude, longitude in orders],
+            [(latitude, longitude) for _, latitude, longitude in riders],
+            settings.DISPATCH_MAX_PICKUP_KM,
+        )
+        rows, cols = solve_assignment(cost, locality=[float(latitude) for _, latitude, _ in orders])
+        pairs = [(orders[row][0], riders[col][0]) for row, col in zip(rows.tolist(), cols.tolist())]
+        assigned = assign_pairs(pairs)
+        logger.info("Dispatch assigned %s of %s open orders to %s idle riders", len(assigned), len(orders), len(riders))
+        return len(assigned)
+    finally:
+        cache.delete(DISPATCH_LOCK_KEY)
@@ -0,0 +1,174 @@
+import math
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Order, OrderTrackingEvent
+
+ETA_MODEL_KEY = "eta:model"
+HOURS_PER_WEEK = 168
+# Each leg runs from one of these statuses to the next.
+LEG_STATUSES = (Order.Status.CONFIRMED, Order.Status.ASSIGNED, Order.Status.PICKED_UP, Order.Status.DELIVERED)
+STATUS_LEGS = {
+    Order.Status.CREATED: 0,
+    Order.Status.CONFIRMED: 0,
+    Order.Status.ASSIGNED: 1,
+    Order.Status.PICKED_UP: 2,
+    Order.Status.IN_TRANSIT: 2,
+}
+LEG_COUNT = len(LEG_STATUSES) - 1
+
+
+def hour_of_week(epoch_seconds):
+    # 1970-01-01 00:00 UTC was a Thursday, i.e. hour 72 of a Monday-based week.
+    return (np.floor_divide(epoch_seconds, 3600).astype(np.int64) + 72) % HOURS_PER_WEEK
+
+
+def _mean(sums, counts, min_samples):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts >= min_samples, sums / counts, np.nan)
+
+
+class EtaModel:
+    """Expected seconds until delivery, per branch, hour of week and current leg."""
+
+    def __init__(self, branch_ids, remaining, fallback, sample_count, fitted_at):
+        self.branch_rows = {branch_id: row for row, branch_id in enumerate(branch_ids)}
+        self.remaining = remaining
+        self.fallback = fallback
+        self.sample_count = sample_count
+        self.fitted_at = fitted_at
+
+    def remaining_seconds(self, branch_id, leg, started_at):
+        how = (int(started_at.timestamp()) // 3600 + 72) % HOURS_PER_WEEK
+        row = self.branch_rows.get(branch_id)
+        value = self.fallback[how, leg] if row is None else self.remaining[row, how, leg]
+        return None if math.isnan(value) else float(value)
+
+
+def fit_eta_model(events, min_samples=None, max_leg_seconds=None, fitted_at=None):
+    """Fit an ``EtaModel`` from ``(order_id, branch_id, status, epoch_seconds)`` rows.
+
+    Leg durations are averaged per branch and hour of week of the leg start.
+    Cells with fewer than ``min_samples`` fall back to the branch average, then
+    to all branches at that hour, then to the overall average.
+    """
+    if min_samples is None:
+        min_samples = settings.ETA_MIN_SAMPLES
+    if max_leg_seconds is None:
+        max_leg_seconds = settings.ETA_MAX_LEG_MINUTES * 60
+    status_codes = {status: index for index, status in enumerate(LEG_STATUSES)}
+    rows = [row for row in events if row[2] in status_codes]
+    if rows:
+        order_ids, branch_ids, statuses, stamps = zip(*rows)
+    else:
+        order_ids, branch_ids, statuses, stamps = (), (), (), ()
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    codes = np.asarray([status_codes[status] for status in statuses], dtype=np.int64)
+    stamps = np.asarray(stamps, dtype=np.float64)
+
+    orders, order_index = np.unique(order_ids, return_inverse=True)
+    first_seen = np.full((len(orders), len(LEG_STATUSES)), np.inf)
+    np.minimum.at(first_seen, (order_index, codes), stamps)
+    order_branch = np.zeros(len(orders), dtype=np.int64)
+    order_branch[order_index] = np.asarray(branch_ids, dtype=np.int64)
+    branches, branch_index = np.unique(order_branch, return_inverse=True)
+
+    with np.errstate(invalid="ignore"):
+        durations = np.diff(first_seen, axis=1)
+    valid = np.isfinite(durations) & (durations > 0) & (durations <= max_leg_seconds)
+
+    cells = len(branches) * HOURS_PER_WEEK
+    sums = np.zeros((len(branches), HOURS_PER_WEEK, LEG_COUNT))
+    counts = np.zeros_like(sums)
+    for leg in range(LEG_COUNT):
+        mask = valid[:, leg]
+        flat = branch_index[mask] * HOURS_PER_WEEK + hour_of_week(first_seen[mask, leg])
+        sums[..., leg] = np.bincount(flat, weights=durations[mask, leg], minlength=cells).reshape(-1, HOURS_PER_WEEK)
+        counts[..., leg] = np.bincount(flat, minlength=cells).reshape(-1, HOURS_PER_WEEK)
+
+    overall = _mean(sums.sum(axis=(0, 1)), counts.sum(axis=(0, 1)), 1)
+    fallback = _mean(sums.sum(axis=0), counts.sum(axis=0), min_samples)
+    fallback = np.where(np.isnan(fallback), overall, fallback)
+    legs = _mean(sums, counts, min_samples)
+    legs = np.where(np.isnan(legs), _mean(sums.sum(axis=1), counts.sum(axis=1), min_samples)[:, None, :], legs)
+    legs = np.where(np.isnan(legs), fallback[None, :, :], legs)
+
+    def remaining(table):
+        # Seconds from the start of each leg to delivery.
+        return np.flip(np.cumsum(np.flip(table, axis=-1), axis=-1), axis=-1).astype(np.float32)
+
+    return EtaModel(
+        branches.tolist(),
+        remaining(legs),
+        remaining(fallback),
+        int(valid[:, -1].sum()),
+        fitted_at or timezone.now(),
+    )
+
+
+def load_tracking_events(since):
+    return (
+        OrderTrackingEvent.objects.filter(created_at__gte=since, status__in=LEG_STATUSES)
+        .values_list("order_id", "order__merchant_branch_id", "status", "created_at")
+        .iterator(chunk_size=10000)
+    )
+
+
+def refresh_eta_model():
+    now = timezone.now()
+    events = (
+        (order_id, branch_id, status, created_at.timestamp())
+        for order_id, branch_id, status, created_at in load_tracking_events(
+            now - timedelta(days=settings.ETA_LOOKBACK_DAYS)
+        )
+    )
+    model = fit_eta_model(events, fitted_at=now)
+    cache.set(ETA_MODEL_KEY, model, timeout=None)
+    return model
+
+
+_model = None
+_loaded_at = None
+
+
+def current_eta_model():
+    """Process-local copy of the fitted model, reloaded from the cache every ``ETA_RELOAD_SECONDS``."""
+    global _model, _loaded_at
+    if _loaded_at is None or time.monotonic() - _loaded_at > settings.ETA_RELOAD_SECONDS:
+        _model = cache.get(ETA_MODEL_KEY)
+        _loaded_at = time.monotonic()
+    return _model
+
+
+def estimate_delivery(branch_id, status=Order.Status.CONFIRMED, leg_started_at=None):
+    """Return the estimated delivery time, or ``None`` when the order is finished or no model is fitted."""
+    leg = STATUS_LEGS.get(status)
+    model = current_eta_model()
+    if leg is None or model is None:
+        return None
+    now = timezone.now()
+    started_at = leg_started_at or now
+    seconds = model.remaining_seconds(branch_id, leg, started_at)
+    if seconds is None:
+        return None
+    return max(started_at + timedelta(seconds=seconds), now)
+
+
+def estimate_order_delivery(order, events):
+    leg = STATUS_LEGS.get(order.status)
+    if leg is None:
+        return None
+    leg_starts = [event.created_at for event in events if event.status == LEG_STATUSES[leg]]
+    return estimate_delivery(order.merchant_branch_id, order.status, max(leg_starts, default=None))
+
+
+def eta_fields(estimated_at):
+    if estimated_at is None:
+        return {"eta_minutes": None, "estimated_delivery_at": None}
+    minutes = (estimated_at - timezone.now()).total_seconds() / 60
+    return {"eta_minutes": round(max(minutes, 0), 1), "estimated_delivery_at": estimated_at.isoformat()}
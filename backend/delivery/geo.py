@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+NEAREST_BLOCK_ROWS = 1024
+
+
+def to_radians(coordinates):
+    """Convert (latitude, longitude) pairs of Decimals/floats into an ``(n, 2)`` float64 radian array.
+
+    Missing coordinates become NaN, so any distance involving them is NaN too.
+    """
+    if isinstance(coordinates, np.ndarray):
+        return np.radians(coordinates.astype(np.float64, copy=False).reshape(-1, 2))
+    array = np.array(
+        [
+            (np.nan if latitude is None else float(latitude), np.nan if longitude is None else float(longitude))
+            for latitude, longitude in coordinates
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+    return np.radians(array)
+
+
+def haversine_matrix(origins, destinations):
+    """Great-circle distances in km between every origin row and every destination row (radians)."""
+    lat1 = origins[:, 0:1]
+    lon1 = origins[:, 1:2]
+    lat2 = destinations[:, 0]
+    lon2 = destinations[:, 1]
+    # Same formula as haversine_km, evaluated in place to avoid n x m temporaries.
+    h = np.subtract(lat2, lat1)
+    h *= 0.5
+    np.sin(h, out=h)
+    h *= h
+    term = np.subtract(lon2, lon1)
+    term *= 0.5
+    np.sin(term, out=term)
+    term *= term
+    term *= np.cos(lat1)
+    term *= np.cos(lat2)
+    h += term
+    np.clip(h, 0.0, 1.0, out=h)
+    np.sqrt(h, out=h)
+    np.arcsin(h, out=h)
+    h *= 2.0 * EARTH_RADIUS_KM
+    return h
+
+
+def haversine_from(origin, destinations):
+    """Distances in km from one radian ``(lat, lon)`` origin to every destination row, as a 1-d array."""
+    return haversine_matrix(np.asarray(origin, dtype=np.float64).reshape(1, 2), destinations)[0]
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    """Scalar fast path in plain floats for a single pair of degree coordinates."""
+    lat1 = math.radians(float(latitude1))
+    lat2 = math.radians(float(latitude2))
+    h = (
+        math.sin((lat2 - lat1) * 0.5) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(math.radians(float(longitude2) - float(longitude1)) * 0.5) ** 2
+    )
+    return 2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(max(h, 0.0), 1.0)))
+
+
+def nearest_k(origins, destinations, k, max_km=None):
+    """The ``k`` closest destinations for each origin row (radians), nearest first.
+
+    Returns ``(indices, distances)``, both shaped ``(len(origins), k)``. Slots
+    with no destination (fewer than ``k``, or beyond ``max_km``) get index -1
+    and distance inf. Work is done in row blocks to bound memory.
+    """
+    count = len(destinations)
+    k_eff = min(k, count)
+    indices = np.full((len(origins), k), -1, dtype=np.int64)
+    distances = np.full((len(origins), k), np.inf)
+    if not k_eff:
+        return indices, distances
+    for start in range(0, len(origins), NEAREST_BLOCK_ROWS):
+        block = haversine_matrix(origins[start : start + NEAREST_BLOCK_ROWS], destinations)
+        block[np.isnan(block)] = np.inf
+        if max_km is not None:
+            block[block > max_km] = np.inf
+        if k_eff < count:
+            candidates = np.argpartition(block, k_eff - 1, axis=1)[:, :k_eff]
+        else:
+            candidates = np.broadcast_to(np.arange(count), (len(block), count))
+        candidate_distances = np.take_along_axis(block, candidates, axis=1)
+        order = np.argsort(candidate_distances, axis=1, kind="stable")
+        block_indices = np.take_along_axis(candidates, order, axis=1)
+        block_distances = np.take_along_axis(candidate_distances, order, axis=1)
+        block_indices[~np.isfinite(block_distances)] = -1
+        indices[start : start + len(block), :k_eff] = block_indices
+        distances[start : start + len(block), :k_eff] = block_distances
+    return indices, distances
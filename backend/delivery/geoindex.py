@@ -0,0 +1,153 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from .models import Order, RiderAvailability, RiderProfile
+from .positions import buffer_position, overlay_positions, rider_position
+
+
+class GeoIndex:
+    def __init__(self, key):
+        self.key = key
+
+    def connection(self):
+        return get_redis_connection("default")
+
+    def add(self, member_id, latitude, longitude):
+        self.connection().geoadd(self.key, (float(longitude), float(latitude), member_id))
+
+    def remove(self, *member_ids):
+        if member_ids:
+            self.connection().zrem(self.key, *member_ids)
+
+    def search(self, latitude, longitude, radius_km, limit=None):
+        results = self.connection().geosearch(
+            self.key,
+            longitude=float(longitude),
+            latitude=float(latitude),
+            radius=radius_km,
+            unit="km",
+            sort="ASC",
+            count=limit,
+            withdist=True,
+        )
+        return [(int(member), distance) for member, distance in results]
+
+    def replace(self, members):
+        connection = self.connection()
+        staging_key = f"{self.key}:rebuild"
+        pipe = connection.pipeline()
+        pipe.delete(staging_key)
+        for start in range(0, len(members), 1000):
+            values = []
+            for member_id, latitude, longitude in members[start : start + 1000]:
+                values.extend((float(longitude), float(latitude), member_id))
+            pipe.geoadd(staging_key, values)
+        pipe.execute()
+        if members:
+            connection.rename(staging_key, self.key)
+        else:
+            connection.delete(self.key)
+
+
+online_riders = GeoIndex("geo:riders:online")
+open_orders = GeoIndex("geo:orders:open")
+# Riders who are online and KYC-verified, with or without a known position.
+# A ping adds a rider to online_riders only if they are in this set, so the
+# first ping after going online enrols them.
+DISPATCHABLE_RIDERS_KEY = "riders:dispatchable"
+MOVE_RIDER_SCRIPT = """
+if redis.call("sismember", KEYS[2], ARGV[3]) == 1 then
+    return redis.call("geoadd", KEYS[1], ARGV[1], ARGV[2], ARGV[3])
+end
+return redis.call("geoadd", KEYS[1], "XX", ARGV[1], ARGV[2], ARGV[3])
+"""
+
+
+def rider_is_dispatchable(rider, availability):
+    return bool(availability and availability.is_online and rider.kyc_status == "VERIFIED")
+
+
+def sync_rider(rider, availability=None):
+    if availability is None:
+        availability = RiderAvailability.objects.filter(rider=rider).first()
+    connection = online_riders.connection()
+    if not rider_is_dispatchable(rider, availability):
+        connection.srem(DISPATCHABLE_RIDERS_KEY, rider.id)
+        online_riders.remove(rider.id)
+        return
+    connection.sadd(DISPATCHABLE_RIDERS_KEY, rider.id)
+    position = rider_position(rider.id)
+    if position is not None:
+        online_riders.add(rider.id, position[0], position[1])
+
+
+def update_rider_position(rider_id, latitude, longitude, order_ids=()):
+    """Buffer a position ping and move the rider in the online index in one round trip.
+
+    ``order_ids`` are the rider's active orders, recorded with the trail point.
+    """
+    connection = online_riders.connection()
+    pipe = connection.pipeline(transaction=False)
+    updated_at = buffer_position(rider_id, latitude, longitude, pipe, order_ids=order_ids)
+    connection.register_script(MOVE_RIDER_SCRIPT)(
+        keys=[online_riders.key, DISPATCHABLE_RIDERS_KEY],
+        args=[float(longitude), float(latitude), rider_id],
+        client=pipe,
+    )
+    pipe.execute()
+    return updated_at
+
+
+def nearest_online_riders(latitude, longitude, radius_km=None, limit=10):
+    """Return ``(rider_id, distance_km)`` pairs for the closest online, KYC-verified riders."""
+    if radius_km is None:
+        radius_km = settings.RIDER_SEARCH_RADIUS_KM
+    return online_riders.search(latitude, longitude, radius_km, limit)
+
+
+def sync_open_order(order):
+    is_open = order.status == Order.Status.CONFIRMED and order.rider_id is None
+    if is_open and order.pickup_latitude is not None and order.pickup_longitude is not None:
+        open_orders.add(order.id, order.pickup_latitude, order.pickup_longitude)
+    else:
+        open_orders.remove(order.id)
+
+
+def nearby_open_orders(latitude, longitude, radius_km=None, limit=None):
+    """Return ``(order_id, distance_km)`` pairs for open orders ranked by pickup distance."""
+    if radius_km is None:
+        radius_km = settings.RIDER_FEED_RADIUS_KM
+    if limit is None:
+        limit = settings.RIDER_FEED_MAX_ORDERS
+    return open_orders.search(latitude, longitude, radius_km, limit)
+
+
+def rebuild_rider_index():
+    riders = list(
+        RiderProfile.objects.filter(
+            availability__is_online=True,
+            kyc_status="VERIFIED",
+        ).values_list("id", "location__latitude", "location__longitude")
+    )
+    connection = online_riders.connection()
+    pipe = connection.pipeline()
+    pipe.delete(DISPATCHABLE_RIDERS_KEY)
+    if riders:
+        pipe.sadd(DISPATCHABLE_RIDERS_KEY, *[rider_id for rider_id, _, _ in riders])
+    pipe.execute()
+    members = overlay_positions(riders)
+    online_riders.replace(members)
+    return len(members)
+
+
+def rebuild_open_order_index():
+    members = list(
+        Order.objects.filter(
+            status=Order.Status.CONFIRMED,
+            rider__isnull=True,
+            pickup_latitude__isnull=False,
+            pickup_longitude__isnull=False,
+        ).values_list("id", "pickup_latitude", "pickup_longitude")
+    )
+    open_orders.replace(members)
+    return len(members)
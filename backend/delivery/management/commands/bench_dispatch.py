@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from delivery.dispatch import build_cost_matrix, solve_assignment
+
+
+class Command(BaseCommand):
+    help = "Time cost-matrix construction and assignment on synthetic orders and riders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=5000)
+        parser.add_argument("--riders", type=int, default=5000)
+        parser.add_argument("--max-pickup-km", type=float, default=5.0)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        # Roughly a 40 km x 40 km metro area.
+        center = np.array([37.77, -122.42])
+        orders = center + rng.uniform(-0.18, 0.18, size=(options["orders"], 2))
+        riders = center + rng.uniform(-0.18, 0.18, size=(options["riders"], 2))
+
+        started = time.perf_counter()
+        cost = build_cost_matrix(orders.tolist(), riders.tolist(), options["max_pickup_km"])
+        matrix_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows, cols = solve_assignment(cost, locality=orders[:, 0], improvement_rounds=0)
+        greedy_seconds = time.perf_counter() - started
+        greedy_total = float(cost[rows, cols].sum())
+
+        started = time.perf_counter()
+        rows, cols = solve_assignment(cost, locality=orders[:, 0])
+        solve_seconds = time.perf_counter() - started
+        total = float(cost[rows, cols].sum())
+
+        self.stdout.write(f"cost matrix {cost.shape[0]}x{cost.shape[1]}: {matrix_seconds * 1000:.0f} ms")
+        self.stdout.write(
+            f"greedy only:        {greedy_seconds * 1000:.0f} ms, {len(rows)} assigned, "
+            f"{greedy_total / max(len(rows), 1):.3f} km mean pickup"
+        )
+        self.stdout.write(
+            f"greedy + swaps:     {solve_seconds * 1000:.0f} ms, {len(rows)} assigned, "
+            f"{total / max(len(rows), 1):.3f} km mean pickup"
+        )
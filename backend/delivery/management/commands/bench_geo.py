@@ -0,0 +1,70 @@
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from delivery.geo import haversine_from, haversine_km, haversine_matrix, nearest_k, to_radians
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark the haversine helpers for 1 x N and N x M inputs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 1000000])
+        parser.add_argument("--matrix-sizes", type=int, nargs="+", default=[100, 1000, 4000])
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        self.rng = np.random.default_rng(options["seed"])
+        self.repeat = options["repeat"]
+        self.check_agreement()
+
+        origin = self.points(1)[0]
+        for size in options["sizes"]:
+            points = self.points(size)
+            radians = to_radians(points)
+            origin_radians = to_radians(origin.reshape(1, 2))[0]
+            if size <= 100000:
+                self.time(f"scalar loop    1 x {size}", lambda: [haversine_km(*origin, *point) for point in points])
+            self.time(f"vectorized     1 x {size}", lambda: haversine_from(origin_radians, radians))
+            if size <= 100000:
+                decimals = [(Decimal(f"{lat:.6f}"), Decimal(f"{lon:.6f}")) for lat, lon in points]
+                self.time(f"Decimal -> rad     {size}", lambda: to_radians(decimals))
+
+        for size in options["matrix_sizes"]:
+            origins = to_radians(self.points(size))
+            destinations = to_radians(self.points(size))
+            self.time(f"matrix     {size} x {size}", lambda: haversine_matrix(origins, destinations))
+            self.time(
+                f"nearest-{options['k']}  {size} x {size}",
+                lambda: nearest_k(origins, destinations, options["k"]),
+            )
+
+    def points(self, count):
+        # Roughly a 40 km x 40 km metro area.
+        return np.array([37.77, -122.42]) + self.rng.uniform(-0.18, 0.18, size=(count, 2))
+
+    def check_agreement(self):
+        origins = self.points(50)
+        destinations = self.points(200)
+        matrix = haversine_matrix(to_radians(origins), to_radians(destinations))
+        scalar = np.array([[haversine_km(*origin, *destination) for destination in destinations] for origin in origins])
+        if not np.allclose(matrix, scalar, rtol=0, atol=1e-9):
+            raise CommandError("Vectorized and scalar haversine disagree.")
+        indices, distances = nearest_k(to_radians(origins), to_radians(destinations), 3)
+        expected = np.sort(matrix, axis=1)[:, :3]
+        if not np.allclose(distances, expected) or not np.allclose(
+            np.take_along_axis(matrix, indices, axis=1), expected
+        ):
+            raise CommandError("nearest_k disagrees with a full sort.")
+
+    def time(self, label, function):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        self.stdout.write(f"{label:<28} best {min(timings) * 1000:10.3f} ms")
@@ -0,0 +1,75 @@
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from delivery.models import Notification
+from delivery.notifications import broadcast_notification, notify_users
+
+User = get_user_model()
+
+PREFIX = "bench_notify_"
+
+
+class Rollback(Exception):
+    pass
+
+
+def notify_one_by_one(user_ids, notification_type, payload):
+    # The previous implementation: one INSERT and one event-loop bridge per recipient.
+    channel_layer = get_channel_layer()
+    for user_id in user_ids:
+        notification = Notification.objects.create(
+            user_id=user_id, notification_type=notification_type, payload=payload
+        )
+        async_to_sync(channel_layer.group_send)(
+            f"user_{user_id}_notifications",
+            {"type": "notification.message", "payload": {"id": notification.id}},
+        )
+
+
+class Command(BaseCommand):
+    help = "Compare per-recipient notifications with the batched path, plus a broadcast to every user"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipients", type=int, default=1000)
+        parser.add_argument("--broadcast-users", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    [
+                        User(username=f"{PREFIX}{index}", password="!")
+                        for index in range(max(options["recipients"], options["broadcast_users"]))
+                    ],
+                    batch_size=5000,
+                )
+                user_ids = list(
+                    User.objects.filter(username__startswith=PREFIX)
+                    .order_by("id")
+                    .values_list("id", flat=True)[: options["recipients"]]
+                )
+                payload = {"title": "Bench", "body": "Benchmark notification"}
+                self.time("one by one", len(user_ids), lambda: notify_one_by_one(user_ids, "BENCH", payload))
+                self.time("notify_users", len(user_ids), lambda: notify_users(user_ids, "BENCH", payload))
+                notified = self.time(
+                    "broadcast",
+                    User.objects.filter(is_active=True).count(),
+                    lambda: broadcast_notification("BENCH", payload),
+                )
+                if notified != User.objects.filter(is_active=True).count():
+                    raise CommandError(f"Broadcast reached {notified} users.")
+                raise Rollback
+        except Rollback:
+            pass
+
+    def time(self, label, count, function):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:<14} {count:>7} users  {elapsed * 1000:9.1f} ms  {count / elapsed:9.0f} users/s")
+        return result
@@ -0,0 +1,114 @@
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from delivery.assignment import claim_order
+from delivery.models import (
+    CustomerProfile,
+    MerchantBranch,
+    MerchantProfile,
+    Order,
+    RiderProfile,
+)
+
+User = get_user_model()
+
+PREFIX = "bench_accept_"
+
+
+class Command(BaseCommand):
+    help = "Measure order acceptance latency with many riders claiming the same orders concurrently"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--riders", type=int, default=50)
+        parser.add_argument("--orders", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"Leftover {PREFIX}* users found; delete them before running the benchmark.")
+        try:
+            riders, orders = self.seed(options["riders"], options["orders"])
+            self.run(riders, orders)
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+    def seed(self, rider_count, order_count):
+        customer = CustomerProfile.objects.create(
+            user=User.objects.create_user(username=f"{PREFIX}customer", password=None)
+        )
+        merchant = MerchantProfile.objects.create(
+            user=User.objects.create_user(username=f"{PREFIX}merchant", password=None, role=User.Roles.MERCHANT),
+            business_name="Bench",
+        )
+        branch = MerchantBranch.objects.create(
+            merchant=merchant, name="Bench Branch", address_line1="1 Bench Street", city="San Francisco"
+        )
+        riders = [
+            RiderProfile.objects.create(
+                user=User.objects.create_user(
+                    username=f"{PREFIX}rider_{index}", password=None, role=User.Roles.RIDER
+                ),
+                kyc_status="VERIFIED",
+            )
+            for index in range(rider_count)
+        ]
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    customer=customer,
+                    merchant_branch=branch,
+                    status=Order.Status.CONFIRMED,
+                    pickup_address_line1=branch.address_line1,
+                    pickup_city=branch.city,
+                    dropoff_address_line1="2 Bench Avenue",
+                    dropoff_city="San Francisco",
+                    total=Decimal("10.00"),
+                )
+                for _ in range(order_count)
+            ]
+        )
+        return riders, orders
+
+    def run(self, riders, orders):
+        won, lost = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(riders))
+
+        def rider_worker(rider):
+            try:
+                connection.ensure_connection()
+                for order in orders:
+                    barrier.wait()
+                    started = time.perf_counter()
+                    event_id = claim_order(order.id, rider)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        (won if event_id else lost).append(elapsed)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=rider_worker, args=(rider,)) for rider in riders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if len(won) != len(orders):
+            raise CommandError(f"Expected {len(orders)} winning claims, got {len(won)}.")
+        self.report("winners", won)
+        self.report("losers", lost)
+
+    def report(self, label, timings):
+        if not timings:
+            return
+        timings = sorted(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f"{label:<8} n={len(timings):<6} p50 {statistics.median(timings) * 1000:7.2f} ms"
+            f"  p99 {p99 * 1000:7.2f} ms  max {timings[-1] * 1000:7.2f} ms"
+        )
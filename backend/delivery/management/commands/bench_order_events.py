@@ -0,0 +1,130 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from delivery.models import (
+    CustomerProfile,
+    MerchantBranch,
+    MerchantProfile,
+    Notification,
+    Order,
+    OrderTrackingEvent,
+    OutboxMessage,
+    RiderProfile,
+)
+from delivery.outbox import enqueue_order_events
+from delivery.tasks import publish_order_event, send_order_status_notifications, send_order_tracking_event
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare the two-task order event path against the fused publish_order_event task"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                events = self.seed(options["events"])
+                self.run(events)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, event_count):
+        customer = CustomerProfile.objects.create(
+            user=User.objects.create_user(username="bench_events_customer", password=None)
+        )
+        merchant = MerchantProfile.objects.create(
+            user=User.objects.create_user(
+                username="bench_events_merchant", password=None, role=User.Roles.MERCHANT
+            ),
+            business_name="Bench",
+        )
+        rider = RiderProfile.objects.create(
+            user=User.objects.create_user(username="bench_events_rider", password=None, role=User.Roles.RIDER)
+        )
+        branch = MerchantBranch.objects.create(
+            merchant=merchant, name="Bench Branch", address_line1="1 Bench Street", city="San Francisco"
+        )
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    customer=customer,
+                    merchant_branch=branch,
+                    rider=rider,
+                    status=Order.Status.PICKED_UP,
+                    pickup_address_line1=branch.address_line1,
+                    pickup_city=branch.city,
+                    dropoff_address_line1="2 Bench Avenue",
+                    dropoff_city="San Francisco",
+                    total=Decimal("10.00"),
+                )
+                for _ in range(event_count)
+            ],
+            batch_size=1000,
+        )
+        return OrderTrackingEvent.objects.bulk_create(
+            [
+                OrderTrackingEvent(
+                    order=order,
+                    status=Order.Status.PICKED_UP,
+                    latitude=Decimal("37.774900"),
+                    longitude=Decimal("-122.419400"),
+                )
+                for order in orders
+            ],
+            batch_size=1000,
+        )
+
+    def run(self, events):
+        def two_tasks():
+            for event in events:
+                send_order_tracking_event.apply((event.order_id, event.id))
+                send_order_status_notifications.apply((event.order_id, event.status))
+
+        with CaptureQueriesContext(connection) as enqueue_queries:
+            started = time.perf_counter()
+            enqueue_order_events([event.id for event in events])
+            enqueue_seconds = time.perf_counter() - started
+        messages = list(OutboxMessage.objects.filter(order_id__in=[event.order_id for event in events]))
+
+        def fused_task():
+            for message in messages:
+                publish_order_event.apply(message.args)
+
+        before = Notification.objects.count()
+        old = self.measure("two tasks", two_tasks, len(events))
+        new = self.measure("publish_order_event", fused_task, len(events))
+        notifications = Notification.objects.count() - before
+        if notifications != 2 * old[2]:
+            raise CommandError(f"Expected both paths to notify {old[2]} users, got {notifications} in total.")
+        self.stdout.write(
+            f"{'enqueue (writer side)':<22} {len(events) / enqueue_seconds:9.0f} events/s"
+            f"  {len(enqueue_queries)} queries in total"
+        )
+        self.stdout.write(f"speedup {new[0] / old[0]:.2f}x")
+
+    def measure(self, label, function, count):
+        before = Notification.objects.count()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+        reads = sum(query["sql"].lstrip().upper().startswith("SELECT") for query in queries)
+        rate = count / elapsed
+        self.stdout.write(
+            f"{label:<22} {rate:9.0f} events/s  {reads / count:5.2f} reads/event"
+            f"  {(len(queries) - reads) / count:5.2f} writes/event"
+        )
+        return rate, reads, Notification.objects.count() - before
@@ -0,0 +1,115 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from delivery.models import (
+    CustomerProfile,
+    InventoryItem,
+    MerchantBranch,
+    MerchantProfile,
+    Order,
+    OrderItem,
+)
+from delivery.serializers import OrderSerializer, order_rows, prefetch_orders, render_order_rows
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare OrderSerializer against the values-based order renderer on synthetic orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--items-per-order", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["orders"], options["items_per_order"])
+                self.run(options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, order_count, items_per_order):
+        customer_user = User.objects.create_user(username="bench_customer", password=None)
+        merchant_user = User.objects.create_user(
+            username="bench_merchant", password=None, role=User.Roles.MERCHANT
+        )
+        customer = CustomerProfile.objects.create(user=customer_user)
+        merchant = MerchantProfile.objects.create(user=merchant_user, business_name="Bench")
+        branch = MerchantBranch.objects.create(
+            merchant=merchant,
+            name="Bench Branch",
+            address_line1="1 Bench Street",
+            city="San Francisco",
+            latitude=Decimal("37.774900"),
+            longitude=Decimal("-122.419400"),
+        )
+        inventory_item = InventoryItem.objects.create(branch=branch, name="Bench Item", price=Decimal("4.50"))
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    customer=customer,
+                    merchant_branch=branch,
+                    status=Order.Status.CONFIRMED,
+                    pickup_address_line1=branch.address_line1,
+                    pickup_city=branch.city,
+                    pickup_latitude=branch.latitude,
+                    pickup_longitude=branch.longitude,
+                    dropoff_address_line1=f"{index} Dropoff Avenue",
+                    dropoff_city="San Francisco",
+                    dropoff_latitude=Decimal("37.780000"),
+                    dropoff_longitude=Decimal("-122.410000"),
+                    subtotal=Decimal("13.50"),
+                    delivery_fee=Decimal("5.00"),
+                    total=Decimal("18.50"),
+                )
+                for index in range(order_count)
+            ],
+            batch_size=1000,
+        )
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    inventory_item=inventory_item,
+                    name=inventory_item.name,
+                    quantity=index + 1,
+                    unit_price=inventory_item.price,
+                )
+                for order in orders
+                for index in range(items_per_order)
+            ],
+            batch_size=1000,
+        )
+        self.queryset = Order.objects.filter(customer=customer).order_by("-created_at", "-id")
+
+    def run(self, repeat):
+        renderer = JSONRenderer()
+
+        def serializer_path():
+            return renderer.render(OrderSerializer(prefetch_orders(self.queryset), many=True).data)
+
+        def row_path():
+            return renderer.render(render_order_rows(order_rows(self.queryset)))
+
+        if serializer_path() != row_path():
+            raise CommandError("Rendered payloads differ between OrderSerializer and render_order_rows.")
+
+        for label, path in (("OrderSerializer", serializer_path), ("render_order_rows", row_path)):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                path()
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(f"{label:<20} best {min(timings) * 1000:9.1f} ms")
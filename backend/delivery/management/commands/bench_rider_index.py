@@ -0,0 +1,45 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from delivery.geoindex import GeoIndex
+
+
+class Command(BaseCommand):
+    help = "Time nearest-rider lookups against a synthetic Redis geo index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--riders", type=int, default=50000)
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--radius-km", type=float, default=3.0)
+        parser.add_argument("--limit", type=int, default=10)
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        # Roughly a 40 km x 40 km metro area.
+        center_lat, center_lon, spread = 37.77, -122.42, 0.18
+        index = GeoIndex("geo:bench:riders")
+        try:
+            index.replace(
+                [
+                    (rider_id, center_lat + rng.uniform(-spread, spread), center_lon + rng.uniform(-spread, spread))
+                    for rider_id in range(1, options["riders"] + 1)
+                ]
+            )
+            timings = []
+            for _ in range(options["queries"]):
+                latitude = center_lat + rng.uniform(-spread, spread)
+                longitude = center_lon + rng.uniform(-spread, spread)
+                started = time.perf_counter()
+                index.search(latitude, longitude, options["radius_km"], options["limit"])
+                timings.append(time.perf_counter() - started)
+        finally:
+            index.connection().delete(index.key)
+
+        timings.sort()
+        self.stdout.write(
+            f"{options['riders']} riders: p50 {statistics.median(timings) * 1000:.3f} ms, "
+            f"p99 {timings[int(len(timings) * 0.99)] * 1000:.3f} ms (including Redis round trip)"
+        )
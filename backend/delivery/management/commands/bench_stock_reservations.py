@@ -0,0 +1,145 @@
+import statistics
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from delivery.models import (
+    CustomerProfile,
+    InventoryItem,
+    MerchantBranch,
+    MerchantProfile,
+    Order,
+    StockReservation,
+)
+from delivery.reservations import (
+    InsufficientStock,
+    commit_reservations,
+    release_expired_reservations,
+    reserve_stock,
+)
+
+User = get_user_model()
+
+PREFIX = "bench_stock_"
+
+
+class Command(BaseCommand):
+    help = "Check that concurrent orders for one SKU never oversell and measure hold latency and throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=300)
+        parser.add_argument("--workers", type=int, default=50)
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--quantity", type=int, default=1)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(f"Leftover {PREFIX}* users found; delete them before running the benchmark.")
+        try:
+            item, orders = self.seed(options["orders"], options["stock"])
+            self.run(item, orders, options["stock"], options["quantity"], options["workers"])
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+    def seed(self, order_count, stock):
+        customer = CustomerProfile.objects.create(
+            user=User.objects.create_user(username=f"{PREFIX}customer", password=None)
+        )
+        merchant = MerchantProfile.objects.create(
+            user=User.objects.create_user(username=f"{PREFIX}merchant", password=None, role=User.Roles.MERCHANT),
+            business_name="Bench",
+        )
+        branch = MerchantBranch.objects.create(
+            merchant=merchant, name="Bench Branch", address_line1="1 Bench Street", city="San Francisco"
+        )
+        item = InventoryItem.objects.create(branch=branch, name="Promo Item", price=Decimal("1.00"), stock=stock)
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    customer=customer,
+                    merchant_branch=branch,
+                    pickup_address_line1=branch.address_line1,
+                    pickup_city=branch.city,
+                    dropoff_address_line1="2 Bench Avenue",
+                    dropoff_city="San Francisco",
+                    total=Decimal("1.00"),
+                )
+                for _ in range(order_count)
+            ]
+        )
+        return item, orders
+
+    def run(self, item, orders, stock, quantity, workers):
+        held, rejected = [], []
+        lock = threading.Lock()
+        workers = min(workers, len(orders))
+        barrier = threading.Barrier(workers)
+
+        def order_worker(batch):
+            try:
+                connection.ensure_connection()
+                barrier.wait()
+                for order in batch:
+                    started = time.perf_counter()
+                    try:
+                        reserve_stock(order, [(item.id, quantity)])
+                        outcome = held
+                    except InsufficientStock:
+                        outcome = rejected
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        outcome.append(elapsed)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=order_worker, args=(orders[index::workers],)) for index in range(workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        expected = min(len(orders), stock // quantity)
+        item.refresh_from_db()
+        if len(held) != expected or item.stock != stock - expected * quantity:
+            raise CommandError(f"Expected {expected} holds, got {len(held)} with {item.stock} left in stock.")
+        self.report("held", held)
+        self.report("rejected", rejected)
+        self.stdout.write(
+            f"throughput {len(orders)} orders over {workers} connections in {wall:.2f} s"
+            f" ({len(orders) / wall:.0f} orders/s)"
+        )
+
+        # Commit half the holds, let the rest expire and check the sweeper returns exactly those.
+        reserved_orders = list(
+            StockReservation.objects.filter(inventory_item=item).values_list("order_id", flat=True).order_by("id")
+        )
+        committed = reserved_orders[: len(reserved_orders) // 2]
+        for order in Order.objects.filter(id__in=committed):
+            commit_reservations(order)
+        started = time.perf_counter()
+        released = release_expired_reservations(
+            now=timezone.now() + timedelta(seconds=86400), batch_size=max(1, len(reserved_orders) // 4)
+        )
+        elapsed = time.perf_counter() - started
+        item.refresh_from_db()
+        if released != len(reserved_orders) - len(committed) or item.stock != stock - len(committed) * quantity:
+            raise CommandError(f"Sweeper released {released} holds, leaving {item.stock} in stock.")
+        self.stdout.write(f"sweeper  released {released} holds in {elapsed * 1000:.2f} ms")
+
+    def report(self, label, timings):
+        if not timings:
+            return
+        timings = sorted(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f"{label:<8} n={len(timings):<6} p50 {statistics.median(timings) * 1000:7.2f} ms"
+            f"  p99 {p99 * 1000:7.2f} ms  max {timings[-1] * 1000:7.2f} ms"
+        )
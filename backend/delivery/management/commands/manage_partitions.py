@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from delivery.partitions import archive_partitions, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly partitions and optionally archive partitions past retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=None)
+        parser.add_argument("--archive", action="store_true", help="Export and drop partitions past retention.")
+        parser.add_argument("--archive-dir", default=None)
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(months_ahead=options["months_ahead"])
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions."))
+        if options["archive"]:
+            archived = archive_partitions(archive_dir=options["archive_dir"])
+            for path in archived:
+                self.stdout.write(path)
+            self.stdout.write(self.style.SUCCESS(f"Archived {len(archived)} partitions."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from delivery.geoindex import rebuild_open_order_index, rebuild_rider_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis geo indexes from the database"
+
+    def handle(self, *args, **options):
+        riders = rebuild_rider_index()
+        orders = rebuild_open_order_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {riders} online riders and {orders} open orders."))
@@ -0,0 +1,33 @@
+import time
+
+from celery import current_app
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from delivery.outbox import RelayMetrics, relay_batch
+
+
+class Command(BaseCommand):
+    help = "Publish transactional outbox messages to Celery after their transactions commit"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        # Register the task modules the messages refer to, as a worker would.
+        current_app.loader.import_default_modules()
+        metrics = RelayMetrics()
+        while True:
+            started = time.perf_counter()
+            result = relay_batch(batch_size)
+            if result is not None:
+                metrics.record(*result, time.perf_counter() - started)
+            metrics.maybe_report()
+            drained = result is None or result[0] < batch_size
+            if drained and options["once"]:
+                return
+            if drained:
+                # Another relay holds the lock, or the outbox is empty.
+                time.sleep(settings.OUTBOX_POLL_SECONDS)
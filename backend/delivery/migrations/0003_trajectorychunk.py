@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("delivery", "0002_order_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrajectoryChunk",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("started_at", models.DateTimeField()),
+                ("ended_at", models.DateTimeField()),
+                ("point_count", models.PositiveIntegerField(default=0)),
+                ("data", models.BinaryField()),
+                ("is_compacted", models.BooleanField(default=False)),
+                (
+                    "order",
+                    models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="trajectory_chunks", to="delivery.order"),
+                ),
+                (
+                    "rider",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="trajectory_chunks", to="delivery.riderprofile"),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["rider", "started_at"], name="trajectory_rider_started_idx"),
+                    models.Index(fields=["order", "started_at"], name="trajectory_order_started_idx"),
+                    models.Index(fields=["started_at"], name="trajectory_started_idx"),
+                ],
+            },
+        ),
+    ]
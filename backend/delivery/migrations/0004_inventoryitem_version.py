@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("delivery", "0003_trajectorychunk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inventoryitem",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("delivery", "0004_inventoryitem_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("quantity", models.PositiveIntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("HELD", "Held"), ("COMMITTED", "Committed"), ("RELEASED", "Released")],
+                        default="HELD",
+                        max_length=20,
+                    ),
+                ),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "inventory_item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="delivery.inventoryitem",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_reservations",
+                        to="delivery.order",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["order"], name="reservation_order_idx"),
+                    models.Index(
+                        condition=models.Q(("status", "HELD")), fields=["expires_at"], name="reservation_held_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,96 @@
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+# Frozen copies of the delivery.partitions helpers, so later changes there cannot alter this migration.
+PARTITIONED_TABLES = ("delivery_ordertrackingevent", "delivery_notification", "delivery_chatmessage")
+
+
+def month_start(value):
+    return value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_table(schema_editor, table):
+    """Rebuild ``table`` as a monthly range-partitioned table on created_at.
+
+    Postgres cannot partition a table in place, so the rows are copied into
+    a new partitioned table that then takes over the name, indexes and
+    constraints. Partitioned primary keys must include the partition key,
+    hence (id, created_at); id stays unique through its sequence.
+    """
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        if cursor.fetchone()[0] == "p":
+            return
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))",
+            [table, table],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype <> 'p'",
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(f"SELECT min(created_at), max(id) FROM {qn(table)}")
+        oldest, last_id = cursor.fetchone()
+
+        staging = f"{table}_partitioned"
+        cursor.execute(
+            f"CREATE TABLE {qn(staging)} (LIKE {qn(table)} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        )
+        now = timezone.now()
+        month = month_start(oldest or now)
+        last_month = add_months(month_start(now), settings.PARTITION_PREMAKE_MONTHS)
+        while month <= last_month:
+            cursor.execute(
+                f"CREATE TABLE {qn(partition_name(table, month))} PARTITION OF {qn(staging)} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)],
+            )
+            month = add_months(month, 1)
+        cursor.execute(f"INSERT INTO {qn(staging)} SELECT * FROM {qn(table)}")
+        cursor.execute(f"DROP TABLE {qn(table)}")
+        cursor.execute(f"ALTER TABLE {qn(staging)} RENAME TO {qn(table)}")
+
+        sequence = f"{table}_id_seq"
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id")
+        cursor.execute("SELECT setval(%s, %s, %s)", [sequence, last_id or 1, last_id is not None])
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [sequence])
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_pkey')} PRIMARY KEY (id, created_at)")
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in PARTITIONED_TABLES:
+        partition_table(schema_editor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("delivery", "0007_notification_inbox_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, elidable=False),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+# Frozen copy of delivery.partitions.PARTITIONED_TABLES.
+PARTITIONED_TABLES = ("delivery_ordertrackingevent", "delivery_notification", "delivery_chatmessage")
+
+
+def create_default_partitions(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            row = cursor.fetchone()
+            if row and row[0] == "p":
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("delivery", "0008_partition_append_only_tables"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_partitions, elidable=False),
+    ]
@@ -0,0 +1,13 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("delivery", "0009_partition_defaults"),
+    ]
+
+    operations = [
+        # Superseded by order_created_id_idx, which has created_at as its leading column.
+        migrations.RemoveIndex(model_name="order", name="delivery_order_created_idx"),
+    ]
@@ -61,6 +61,8 @@ class InventoryItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    # Bumped on every save; signed quotes priced against an older version are re-priced.
+    version = models.PositiveIntegerField(default=1)
 
     class Meta:
         indexes = [models.Index(fields=["branch", "is_active"])]
@@ -68,6 +70,11 @@ class InventoryItem(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.pk is not None and kwargs.get("update_fields") is None:
+            self.version += 1
+        super().save(*args, **kwargs)
+
 
 class Address(models.Model):
     customer = models.ForeignKey(CustomerProfile, on_delete=models.CASCADE, related_name="addresses")
@@ -130,9 +137,16 @@ class Order(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["status"]),
-            models.Index(fields=["created_at"]),
             models.Index(fields=["merchant_branch"]),
             models.Index(fields=["rider"]),
+            models.Index(fields=["-created_at", "-id"], name="order_created_id_idx"),
+            models.Index(fields=["customer", "-created_at", "-id"], name="order_customer_created_idx"),
+            models.Index(fields=["merchant_branch", "-created_at", "-id"], name="order_branch_created_idx"),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="order_open_created_idx",
+                condition=models.Q(status="CONFIRMED", rider__isnull=True),
+            ),
         ]
 
     def __str__(self) -> str:
@@ -150,6 +164,28 @@ class OrderItem(models.Model):
         indexes = [models.Index(fields=["order"])]
 
 
+class StockReservation(models.Model):
+    """Stock taken from an inventory item for an order until it is confirmed or the hold expires."""
+
+    class Status(models.TextChoices):
+        HELD = "HELD", "Held"
+        COMMITTED = "COMMITTED", "Committed"
+        RELEASED = "RELEASED", "Released"
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="stock_reservations")
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["order"], name="reservation_order_idx"),
+            models.Index(fields=["expires_at"], condition=models.Q(status="HELD"), name="reservation_held_idx"),
+        ]
+
+
 class OrderTrackingEvent(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="tracking_events")
     status = models.CharField(max_length=20, choices=Order.Status.choices)
@@ -164,6 +200,16 @@ class OrderTrackingEvent(models.Model):
         ]
 
 
+class OutboxMessage(models.Model):
+    """A Celery task to publish once the transaction that wrote it commits; drained by ``run_outbox_relay``."""
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="outbox_messages")
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class RiderAvailability(models.Model):
     rider = models.OneToOneField(RiderProfile, on_delete=models.CASCADE, related_name="availability")
     is_online = models.BooleanField(default=False)
@@ -181,6 +227,25 @@ class RiderLocation(models.Model):
         indexes = [models.Index(fields=["updated_at"])]
 
 
+class TrajectoryChunk(models.Model):
+    rider = models.ForeignKey(RiderProfile, on_delete=models.CASCADE, related_name="trajectory_chunks")
+    order = models.ForeignKey(
+        Order, on_delete=models.SET_NULL, null=True, blank=True, related_name="trajectory_chunks"
+    )
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    point_count = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()
+    is_compacted = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["rider", "started_at"], name="trajectory_rider_started_idx"),
+            models.Index(fields=["order", "started_at"], name="trajectory_order_started_idx"),
+            models.Index(fields=["started_at"], name="trajectory_started_idx"),
+        ]
+
+
 class RiderEarnings(models.Model):
     rider = models.ForeignKey(RiderProfile, on_delete=models.CASCADE, related_name="earnings")
     period_start = models.DateField()
@@ -226,7 +291,10 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        indexes = [models.Index(fields=["user", "is_read"])]
+        indexes = [
+            models.Index(fields=["user", "is_read"]),
+            models.Index(fields=["user", "-created_at", "-id"], name="notification_inbox_idx"),
+        ]
 
 
 class ChatMessage(models.Model):
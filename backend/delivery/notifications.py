@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import uuid
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Only adjusts counters that are already cached; a missing one is rebuilt
+# from the database on the next read. A recount marker means a reader is
+# counting right now and may have missed this change, so it is dropped and
+# that reader's result is not cached. A negative result means the counter
+# drifted, so it is dropped and recounted.
+ADJUST_UNREAD_SCRIPT = """
+local value = redis.call("get", KEYS[1])
+if not value then
+    return nil
+end
+if not tonumber(value) then
+    redis.call("del", KEYS[1])
+    return nil
+end
+value = redis.call("incrby", KEYS[1], ARGV[1])
+if value < 0 then
+    redis.call("del", KEYS[1])
+end
+return value
+"""
+
+# Caches a recount only if the reader's marker is still in place.
+STORE_UNREAD_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+end
+"""
+RECOUNT_MARKER_SECONDS = 30
+
+
+def unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user_id):
+    """Unread notifications for ``user_id``, served from Redis and recounted on a miss.
+
+    The recount claims the key with a marker first, so a notification or
+    mark-read that commits while it runs clears the marker and the
+    possibly stale count is returned without being cached.
+    """
+    redis = get_redis_connection("default")
+    key = unread_key(user_id)
+    value = redis.get(key)
+    if value is not None and value.isdigit():
+        return int(value)
+    marker = f"recount:{uuid.uuid4().hex}"
+    claimed = value is None and redis.set(key, marker, ex=RECOUNT_MARKER_SECONDS, nx=True)
+    count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    if claimed:
+        redis.register_script(STORE_UNREAD_SCRIPT)(
+            keys=[key], args=[marker, count, settings.NOTIFICATION_UNREAD_TTL_SECONDS]
+        )
+    return count
+
+
+def adjust_unread_counts(deltas):
+    """Apply ``{user_id: delta}`` to the cached counters in one pipeline."""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    redis = get_redis_connection("default")
+    script = redis.register_script(ADJUST_UNREAD_SCRIPT)
+    pipe = redis.pipeline(transaction=False)
+    for user_id, delta in deltas.items():
+        script(keys=[unread_key(user_id)], args=[delta], client=pipe)
+    pipe.execute()
+
+
+def invalidate_unread_counts(user_ids):
+    """Drop the cached counters for ``user_ids`` so their next read recounts."""
+    if user_ids:
+        get_redis_connection("default").delete(*(unread_key(user_id) for user_id in user_ids))
+
+
+def mark_read(user, ids=None):
+    """Mark ``ids`` (or every unread notification) as read with one UPDATE. Returns the number changed."""
+    queryset = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    updated = queryset.update(is_read=True)
+    transaction.on_commit(lambda: adjust_unread_counts({user.id: -updated}))
+    return updated
+
+
+def notification_message(notification):
+    return {
+        "id": notification.id,
+        "type": notification.notification_type,
+        "payload": notification.payload,
+        "created_at": notification.created_at.isoformat(),
+    }
+
+
+async def _group_send_all(messages):
+    channel_layer = get_channel_layer()
+    limit = asyncio.Semaphore(settings.NOTIFICATION_SEND_CONCURRENCY)
+
+    async def send(user_id, message):
+        async with limit:
+            await channel_layer.group_send(
+                f"user_{user_id}_notifications",
+                {"type": "notification.message", "payload": message},
+            )
+
+    results = await asyncio.gather(*(send(user_id, message) for user_id, message in messages), return_exceptions=True)
+    failed = sum(isinstance(result, Exception) for result in results)
+    if failed:
+        logger.warning("Failed to push %s of %s notifications.", failed, len(results))
+
+
+def notify_users(user_ids, notification_type, payload):
+    """Store one notification per user with a single insert and push them all from one event loop."""
+    notifications = Notification.objects.bulk_create(
+        [Notification(user_id=user_id, notification_type=notification_type, payload=payload) for user_id in user_ids]
+    )
+    added = Counter(notification.user_id for notification in notifications)
+    transaction.on_commit(lambda: adjust_unread_counts(added))
+    async_to_sync(_group_send_all)(
+        [(notification.user_id, notification_message(notification)) for notification in notifications]
+    )
+    return len(notifications)
+
+
+def broadcast_notification(notification_type, payload, batch_size=None):
+    """Notify every active user, ``NOTIFICATION_BATCH_SIZE`` users at a time. Returns the number notified."""
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    user_ids = User.objects.filter(is_active=True).order_by("id").values_list("id", flat=True)
+    batch, notified = [], 0
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            notified += notify_users(batch, notification_type, payload)
+            batch = []
+    if batch:
+        notified += notify_users(batch, notification_type, payload)
+    return notified
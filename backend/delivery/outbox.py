@@ -0,0 +1,167 @@
+import logging
+import time
+
+from celery import current_app
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import OrderTrackingEvent, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+RELAY_LOCK_ID = 0x6F7574626F78
+METRICS_KEY = "outbox:metrics"
+ORDER_EVENT_TASK = "delivery.tasks.publish_order_event"
+
+
+def _coordinate(value):
+    return str(value) if value is not None else None
+
+
+def enqueue_order_events(event_ids):
+    """Queue one ``publish_order_event`` message per tracking event.
+
+    Each message carries the serialized event and the user ids to notify, so
+    the worker never reads the order tables. Call this inside the transaction
+    that wrote the events: nothing reaches Celery until it commits and the
+    relay picks the rows up.
+    """
+    rows = (
+        OrderTrackingEvent.objects.filter(id__in=event_ids)
+        .order_by("id")
+        .values_list(
+            "id",
+            "order_id",
+            "status",
+            "latitude",
+            "longitude",
+            "created_at",
+            "order__customer__user_id",
+            "order__rider__user_id",
+            "order__merchant_branch__merchant__user_id",
+        )
+    )
+    OutboxMessage.objects.bulk_create(
+        [
+            OutboxMessage(
+                order_id=order_id,
+                task=ORDER_EVENT_TASK,
+                args=[
+                    {
+                        "id": event_id,
+                        "order_id": order_id,
+                        "status": status,
+                        "latitude": _coordinate(latitude),
+                        "longitude": _coordinate(longitude),
+                        "created_at": created_at.isoformat(),
+                    },
+                    [user_id for user_id in recipients if user_id is not None],
+                ],
+            )
+            for event_id, order_id, status, latitude, longitude, created_at, *recipients in rows
+        ]
+    )
+
+
+def enqueue_order_event(event):
+    enqueue_order_events([event.id])
+
+
+def relay_batch(batch_size=None):
+    """Publish up to ``batch_size`` outbox messages in id order over one broker connection.
+
+    Returns ``(published, failed)``, or ``None`` when another relay holds the
+    lock. Messages are deleted only after they were handed to the broker, so
+    delivery is at-least-once. A failure holds back the rest of that order's
+    messages until the next batch, which keeps each order's events in order.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [RELAY_LOCK_ID])
+            if not cursor.fetchone()[0]:
+                return None
+        messages = list(OutboxMessage.objects.order_by("id")[:batch_size])
+        published, failed, blocked = [], [], set()
+        with current_app.producer_or_acquire() as producer:
+            for message in messages:
+                if message.order_id in blocked:
+                    continue
+                try:
+                    current_app.tasks[message.task].apply_async(message.args, producer=producer)
+                except Exception:
+                    logger.exception("Failed to publish outbox message %s.", message.id)
+                    blocked.add(message.order_id)
+                    failed.append(message.id)
+                else:
+                    published.append(message.id)
+        OutboxMessage.objects.filter(id__in=published).delete()
+        if failed:
+            OutboxMessage.objects.filter(id__in=failed).update(attempts=F("attempts") + 1)
+    return len(published), len(failed)
+
+
+def outbox_backlog():
+    backlog = OutboxMessage.objects.aggregate(count=Count("id"), oldest=Min("created_at"))
+    oldest = backlog["oldest"]
+    return {
+        "backlog": backlog["count"],
+        "oldest_age_seconds": round((timezone.now() - oldest).total_seconds(), 3) if oldest else None,
+    }
+
+
+def outbox_status():
+    """The last metrics snapshot reported by a relay, plus the live backlog."""
+    return {"relay": cache.get(METRICS_KEY), **outbox_backlog()}
+
+
+class RelayMetrics:
+    """Throughput counters for one relay process, logged and cached every ``OUTBOX_METRICS_SECONDS``."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.published = 0
+        self.failed = 0
+        self.batches = 0
+        self.batch_seconds = 0.0
+        self.max_batch_seconds = 0.0
+
+    def record(self, published, failed, seconds):
+        self.published += published
+        self.failed += failed
+        self.batches += 1
+        self.batch_seconds += seconds
+        self.max_batch_seconds = max(self.max_batch_seconds, seconds)
+
+    def maybe_report(self):
+        window = time.monotonic() - self.started
+        if window < settings.OUTBOX_METRICS_SECONDS:
+            return None
+        snapshot = {
+            "window_seconds": round(window, 3),
+            "published": self.published,
+            "failed": self.failed,
+            "batches": self.batches,
+            "messages_per_second": round(self.published / window, 1),
+            "avg_batch_ms": round(self.batch_seconds / self.batches * 1000, 2) if self.batches else None,
+            "max_batch_ms": round(self.max_batch_seconds * 1000, 2),
+            **outbox_backlog(),
+            "reported_at": timezone.now().isoformat(),
+        }
+        cache.set(METRICS_KEY, snapshot, timeout=None)
+        logger.info(
+            "Outbox relay published %s messages (%s/s, %s failed) in %s batches; backlog %s.",
+            snapshot["published"],
+            snapshot["messages_per_second"],
+            snapshot["failed"],
+            snapshot["batches"],
+            snapshot["backlog"],
+        )
+        self.reset()
+        return snapshot
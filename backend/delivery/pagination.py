@@ -0,0 +1,168 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opaque cursor paging over a (sort field, id) keyset; each page is one range scan."""
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = settings.API_PAGE_SIZE
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    # Both fields must sort in the same direction; the last one must be unique.
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(queryset.model, request)
+
+        descending = self.ordering[0].startswith("-")
+        self.field_names = [field.lstrip("-") for field in self.ordering]
+        reverse = bool(self.cursor and self.cursor["reverse"])
+
+        if self.cursor:
+            queryset = queryset.filter(self.boundary_filter(self.cursor["position"], descending != reverse))
+        if reverse:
+            queryset = queryset.order_by(*[self.flip(field) for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if value <= 0:
+            return self.page_size
+        return min(value, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.position_of(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Paged past the end: step back from where the cursor pointed.
+            return self.encode_cursor(self.cursor["position"], reverse=True)
+        return self.encode_cursor(self.position_of(self.page[0]), reverse=True)
+
+    def boundary_filter(self, position, descending):
+        lookup = "lt" if descending else "gt"
+        sort_field, id_field = self.field_names
+        sort_value, id_value = position
+        return Q(**{f"{sort_field}__{lookup}": sort_value}) | Q(
+            **{sort_field: sort_value, f"{id_field}__{lookup}": id_value}
+        )
+
+    def position_of(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name in self.field_names]
+        return [getattr(row, name) for name in self.field_names]
+
+    def encode_cursor(self, position, reverse):
+        token = json.dumps(
+            {"p": [self.encode_value(value) for value in position], "r": int(reverse)},
+            separators=(",", ":"),
+        )
+        encoded = base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, model, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            token = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+            raw_position = token["p"]
+            reverse = bool(token.get("r"))
+            field_names = [field.lstrip("-") for field in self.ordering]
+            if len(raw_position) != len(field_names):
+                raise ValueError
+            position = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(field_names, raw_position)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return {"position": position, "reverse": reverse}
+
+    @staticmethod
+    def encode_value(value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+
+class OrderCursorPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class ChatCursorPagination(KeysetPagination):
+    ordering = ("created_at", "id")
+
+
+class NotificationCursorPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class EarningsCursorPagination(KeysetPagination):
+    ordering = ("-period_start", "-id")
@@ -0,0 +1,183 @@
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification
+from .notifications import invalidate_unread_counts
+
+logger = logging.getLogger(__name__)
+
+# Append-only tables range-partitioned by month on created_at, with the
+# setting that holds how many months each keeps online.
+PARTITIONED_TABLES = {
+    "delivery_ordertrackingevent": "TRACKING_EVENT_RETENTION_MONTHS",
+    "delivery_notification": "NOTIFICATION_RETENTION_MONTHS",
+    "delivery_chatmessage": "CHAT_MESSAGE_RETENTION_MONTHS",
+}
+ARCHIVE_LOCK_KEY = "partitions:archiving"
+ARCHIVE_LOCK_SECONDS = 3600
+PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(value):
+    return value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def is_partitioned(cursor, table):
+    if connection.vendor != "postgresql":
+        return False
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions(cursor, table):
+    """``{month: partition name}`` for the partitions currently attached to ``table``."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(%s)",
+        [table],
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def create_default_partition(cursor, table):
+    """Catch rows outside every monthly partition so inserts never fail if premaking falls behind."""
+    qn = connection.ops.quote_name
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {qn(default_partition_name(table))} PARTITION OF {qn(table)} DEFAULT")
+
+
+def create_partition(cursor, table, month):
+    """Create the partition for ``month``, moving any rows for it out of the default partition.
+
+    Postgres refuses to add a partition whose range already has rows in the
+    default partition, so those are moved while the default is detached.
+    """
+    qn = connection.ops.quote_name
+    name, default = partition_name(table, month), default_partition_name(table)
+    bounds = [month, add_months(month, 1)]
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL, to_regclass(%s) IS NOT NULL", [name, default])
+    exists, has_default = cursor.fetchone()
+    if exists:
+        return
+    with transaction.atomic():
+        stranded = False
+        if has_default:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE created_at >= %s AND created_at < %s)", bounds
+            )
+            stranded = cursor.fetchone()[0]
+        if stranded:
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(default)}")
+        cursor.execute(f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)", bounds)
+        if stranded:
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {qn(default)} WHERE created_at >= %s AND created_at < %s RETURNING *) "
+                f"INSERT INTO {qn(name)} SELECT * FROM moved",
+                bounds,
+            )
+            logger.warning("Moved %s rows from %s into %s.", cursor.rowcount, default, name)
+            cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default)} DEFAULT")
+
+
+def ensure_partitions(now=None, months_ahead=None):
+    """Create any missing monthly partitions from the current month to ``PARTITION_PREMAKE_MONTHS`` ahead.
+
+    Also makes sure each table has its default partition.
+    """
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_PREMAKE_MONTHS
+    current = month_start(now or timezone.now())
+    created = []
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            create_default_partition(cursor, table)
+            existing = list_partitions(cursor, table)
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if month not in existing:
+                    create_partition(cursor, table, month)
+                    created.append(partition_name(table, month))
+    return created
+
+
+def export_partition(cursor, name, archive_dir):
+    """Write the partition to ``<archive_dir>/<name>.csv.gz`` and fsync it; returns the path."""
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    partial = f"{path}.partial"
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as handle:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(name)} TO STDOUT WITH (FORMAT csv, HEADER)", handle
+            )
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+    return path
+
+
+def archive_partitions(now=None, archive_dir=None):
+    """Export partitions that ended before each table's retention window, then detach and drop them.
+
+    Old months no longer receive inserts, so the export reads the attached
+    partition without blocking writers; only the detach and drop lock the
+    parent, briefly. Cached unread counters of users who lose unread
+    notifications are dropped afterwards. Returns the paths written.
+    """
+    archive_dir = archive_dir or settings.PARTITION_ARCHIVE_DIR
+    current = month_start(now or timezone.now())
+    if not cache.add(ARCHIVE_LOCK_KEY, 1, timeout=ARCHIVE_LOCK_SECONDS):
+        return []
+    try:
+        os.makedirs(archive_dir, exist_ok=True)
+        archived = []
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for table, retention_setting in PARTITIONED_TABLES.items():
+                if not is_partitioned(cursor, table):
+                    continue
+                cutoff = add_months(current, -getattr(settings, retention_setting))
+                for month, name in sorted(list_partitions(cursor, table).items()):
+                    if add_months(month, 1) > cutoff:
+                        break
+                    archived.append(export_partition(cursor, name, archive_dir))
+                    unread_users = []
+                    if table == Notification._meta.db_table:
+                        cursor.execute(f"SELECT DISTINCT user_id FROM {qn(name)} WHERE NOT is_read")
+                        unread_users = [row[0] for row in cursor.fetchall()]
+                    with transaction.atomic():
+                        cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+                        cursor.execute(f"DROP TABLE {qn(name)}")
+                        transaction.on_commit(lambda users=unread_users: invalidate_unread_counts(users))
+                    logger.info("Archived partition %s to %s.", name, archived[-1])
+        return archived
+    finally:
+        cache.delete(ARCHIVE_LOCK_KEY)
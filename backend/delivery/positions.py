@@ -0,0 +1,131 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .models import RiderLocation, RiderProfile
+
+POSITIONS_KEY = "rider:positions"
+DIRTY_KEY = "rider:positions:dirty"
+TRAILS_DIRTY_KEY = "rider:trails:dirty"
+COORDINATE_SCALE = 1_000_000
+
+
+def trail_key(rider_id):
+    return f"rider:trail:{rider_id}"
+
+
+def connection():
+    return get_redis_connection("default")
+
+
+def _encode(latitude, longitude, updated_at):
+    return f"{latitude}|{longitude}|{updated_at.isoformat()}"
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        value = value.decode()
+    latitude, longitude, updated_at = value.split("|")
+    return Decimal(latitude), Decimal(longitude), datetime.fromisoformat(updated_at)
+
+
+def buffer_position(rider_id, latitude, longitude, pipe, updated_at=None, order_ids=()):
+    """Queue the latest position for ``rider_id`` on ``pipe``; the caller executes it."""
+    if updated_at is None:
+        updated_at = timezone.now()
+    pipe.hset(POSITIONS_KEY, rider_id, _encode(latitude, longitude, updated_at))
+    pipe.sadd(DIRTY_KEY, rider_id)
+    # Every ping is also appended to the rider's trail as fixed-point
+    # "epoch_ms|lat_e6|lon_e6|order_id,..." for the trajectory store, tagged
+    # with the orders the rider was working on when it was recorded.
+    point = (
+        int(updated_at.timestamp() * 1000),
+        int(Decimal(latitude) * COORDINATE_SCALE),
+        int(Decimal(longitude) * COORDINATE_SCALE),
+        ",".join(map(str, order_ids)),
+    )
+    pipe.rpush(trail_key(rider_id), "|".join(map(str, point)))
+    pipe.sadd(TRAILS_DIRTY_KEY, rider_id)
+    return updated_at
+
+
+def buffered_positions(rider_ids):
+    """Return ``{rider_id: (latitude, longitude, updated_at)}`` for riders present in the buffer."""
+    rider_ids = list(rider_ids)
+    if not rider_ids:
+        return {}
+    values = connection().hmget(POSITIONS_KEY, rider_ids)
+    return {rider_id: _decode(value) for rider_id, value in zip(rider_ids, values) if value is not None}
+
+
+def rider_position(rider_id):
+    """Latest known position, from the buffer first and ``RiderLocation`` otherwise."""
+    position = buffered_positions([rider_id]).get(rider_id)
+    if position is not None:
+        return position
+    location = RiderLocation.objects.filter(rider_id=rider_id).first()
+    if location is None or location.latitude is None or location.longitude is None:
+        return None
+    return location.latitude, location.longitude, location.updated_at
+
+
+def overlay_positions(rows):
+    """Replace ``(rider_id, latitude, longitude)`` rows with buffered positions where newer ones exist."""
+    buffered = buffered_positions(rider_id for rider_id, _, _ in rows)
+    merged = []
+    for rider_id, latitude, longitude in rows:
+        if rider_id in buffered:
+            latitude, longitude, _ = buffered[rider_id]
+        if latitude is not None and longitude is not None:
+            merged.append((rider_id, latitude, longitude))
+    return merged
+
+
+def _persist(positions):
+    locations = list(RiderLocation.objects.filter(rider_id__in=positions).only("id", "rider_id"))
+    for location in locations:
+        location.latitude, location.longitude, location.updated_at = positions[location.rider_id]
+    RiderLocation.objects.bulk_update(locations, ["latitude", "longitude", "updated_at"])
+
+    missing = set(positions) - {location.rider_id for location in locations}
+    if missing:
+        riders = RiderProfile.objects.filter(id__in=missing).values_list("id", flat=True)
+        RiderLocation.objects.bulk_create(
+            [
+                RiderLocation(
+                    rider_id=rider_id,
+                    latitude=positions[rider_id][0],
+                    longitude=positions[rider_id][1],
+                    updated_at=positions[rider_id][2],
+                )
+                for rider_id in riders
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def flush_positions(batch_size=None):
+    """Write buffered positions back to ``RiderLocation`` in batches; returns the number of riders written."""
+    if batch_size is None:
+        batch_size = settings.RIDER_LOCATION_FLUSH_BATCH
+    redis = connection()
+    flushed = 0
+    while True:
+        popped = redis.spop(DIRTY_KEY, batch_size)
+        if not popped:
+            break
+        rider_ids = [int(rider_id) for rider_id in popped]
+        try:
+            positions = buffered_positions(rider_ids)
+            if positions:
+                _persist(positions)
+        except Exception:
+            redis.sadd(DIRTY_KEY, *rider_ids)
+            raise
+        flushed += len(positions)
+        if len(rider_ids) < batch_size:
+            break
+    return flushed
@@ -1,21 +1,130 @@
-from decimal import Decimal, InvalidOperation
+import json
+import logging
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 
 from core.models import DeliverySetting
+from core.settings_cache import delivery_settings
+
+from .geo import haversine_km
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_DELIVERY_FEE = Decimal("5.00")
+CENT = Decimal("0.01")
 
 
-def get_delivery_fee_setting() -> Decimal:
-    setting = DeliverySetting.objects.filter(key=DeliverySetting.Keys.DELIVERY_FEE_FLAT).first()
-    if not setting or not setting.value:
-        return DEFAULT_DELIVERY_FEE
+def _decimal(value, default=None):
+    if value is None or value == "":
+        return default
     try:
-        return Decimal(setting.value)
+        return Decimal(str(value))
     except (InvalidOperation, TypeError):
-        return DEFAULT_DELIVERY_FEE
+        return default
+
+
+class Zone:
+    def __init__(self, name, latitude, longitude, radius_km, multiplier, surcharge):
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_km = radius_km
+        self.multiplier = multiplier
+        self.surcharge = surcharge
+
+    def contains(self, latitude, longitude):
+        return haversine_km(self.latitude, self.longitude, latitude, longitude) <= self.radius_km
+
+
+class RateCard:
+    """Delivery pricing compiled from the ``DELIVERY_FEE_FLAT`` and ``RATE_CARD`` settings.
+
+    Without a rate card every delivery costs ``flat_fee``. With one, the fee is
+    ``(base_fee + per_km * distance) * vehicle multiplier * zone multiplier +
+    zone surcharge``, clamped to ``[min_fee, max_fee]``. The first zone
+    containing the dropoff applies. Orders without coordinates pay ``flat_fee``.
+    """
+
+    def __init__(self, flat_fee, base_fee=None, per_km=None, min_fee=None, max_fee=None, vehicles=None, zones=()):
+        self.flat_fee = flat_fee
+        self.base_fee = base_fee
+        self.per_km = per_km
+        self.min_fee = min_fee
+        self.max_fee = max_fee
+        self.vehicles = vehicles or {}
+        self.zones = list(zones)
+
+    @classmethod
+    def compile(cls, flat_value=None, rate_card_value=None):
+        flat_fee = _decimal(flat_value, DEFAULT_DELIVERY_FEE)
+        if not rate_card_value:
+            return cls(flat_fee)
+        try:
+            data = json.loads(rate_card_value)
+            return cls(
+                flat_fee,
+                base_fee=Decimal(str(data["base_fee"])),
+                per_km=Decimal(str(data["per_km"])),
+                min_fee=_decimal(data.get("min_fee")),
+                max_fee=_decimal(data.get("max_fee")),
+                vehicles={key: Decimal(str(value)) for key, value in data.get("vehicles", {}).items()},
+                zones=[
+                    Zone(
+                        zone.get("name", ""),
+                        float(zone["latitude"]),
+                        float(zone["longitude"]),
+                        float(zone["radius_km"]),
+                        Decimal(str(zone.get("multiplier", "1"))),
+                        Decimal(str(zone.get("surcharge", "0"))),
+                    )
+                    for zone in data.get("zones", [])
+                ],
+            )
+        except (ValueError, KeyError, TypeError, AttributeError, InvalidOperation):
+            logger.warning("Invalid RATE_CARD setting; falling back to the flat delivery fee.")
+            return cls(flat_fee)
+
+    def zone_for(self, latitude, longitude):
+        for zone in self.zones:
+            if zone.contains(latitude, longitude):
+                return zone
+        return None
+
+    def fee(self, subtotal, pickup=None, dropoff=None, vehicle_type=None):
+        if subtotal <= 0:
+            return Decimal("0.00")
+        if self.base_fee is None or not pickup or not dropoff or None in (*pickup, *dropoff):
+            return self.flat_fee
+        distance_km = Decimal(str(round(haversine_km(*pickup, *dropoff), 3)))
+        fee = (self.base_fee + self.per_km * distance_km) * self.vehicles.get(vehicle_type, Decimal("1"))
+        zone = self.zone_for(*dropoff)
+        if zone:
+            fee = fee * zone.multiplier + zone.surcharge
+        if self.min_fee is not None:
+            fee = max(fee, self.min_fee)
+        if self.max_fee is not None:
+            fee = min(fee, self.max_fee)
+        return fee.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+_rate_card = None
+_rate_card_source = None
+
+
+def get_rate_card():
+    """Compiled rate card, rebuilt whenever the process-local settings cache reloads."""
+    global _rate_card, _rate_card_source
+    values = delivery_settings.values()
+    if values is not _rate_card_source:
+        _rate_card = RateCard.compile(
+            values.get(DeliverySetting.Keys.DELIVERY_FEE_FLAT), values.get(DeliverySetting.Keys.RATE_CARD)
+        )
+        _rate_card_source = values
+    return _rate_card
+
+
+def get_delivery_fee_setting() -> Decimal:
+    return get_rate_card().flat_fee
 
 
-def calculate_delivery_fee(subtotal: Decimal) -> Decimal:
-    if subtotal <= 0:
-        return Decimal("0.00")
-    return get_delivery_fee_setting()
+def calculate_delivery_fee(subtotal: Decimal, pickup=None, dropoff=None, vehicle_type=None) -> Decimal:
+    return get_rate_card().fee(subtotal, pickup, dropoff, vehicle_type)
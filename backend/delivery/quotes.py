@@ -0,0 +1,94 @@
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import InventoryItem, RiderProfile
+
+QUOTE_TOKEN_SALT = "delivery.quote"
+ADDRESS_FIELDS = ("address_line1", "address_line2", "city", "state", "postal_code", "country", "latitude", "longitude")
+AMOUNT_FIELDS = ("subtotal", "delivery_fee", "total")
+
+
+class QuoteJSONSerializer(signing.JSONSerializer):
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(",", ":"), cls=DjangoJSONEncoder).encode("latin-1")
+
+
+def snapshot_quote(quote, customer_profile, vehicle_type):
+    """Flatten a ``build_quote`` result into everything ``create_order`` needs, without model instances."""
+    return {
+        "customer_id": customer_profile.id,
+        "merchant_branch_id": quote["branch"].id,
+        "dropoff_address_id": quote["dropoff_address"].id,
+        "vehicle_type": vehicle_type,
+        "pickup": {field: getattr(quote["branch"], field) for field in ADDRESS_FIELDS},
+        "dropoff": {field: getattr(quote["dropoff_address"], field) for field in ADDRESS_FIELDS},
+        "items": [
+            {
+                "inventory_item_id": item["inventory_item"].id,
+                "version": item["inventory_item"].version,
+                "name": item["name"],
+                "quantity": item["quantity"],
+                "unit_price": item["unit_price"],
+            }
+            for item in quote["items"]
+        ],
+        **{field: quote[field] for field in AMOUNT_FIELDS},
+    }
+
+
+def sign_quote(snapshot):
+    return signing.dumps(snapshot, salt=QUOTE_TOKEN_SALT, serializer=QuoteJSONSerializer, compress=True)
+
+
+def _decimal(value):
+    return None if value is None else Decimal(value)
+
+
+def load_quote(token):
+    """Return the signed snapshot, or ``None`` when the token is invalid or older than ``QUOTE_TOKEN_MAX_AGE_SECONDS``."""
+    try:
+        snapshot = signing.loads(
+            token,
+            salt=QUOTE_TOKEN_SALT,
+            serializer=QuoteJSONSerializer,
+            max_age=settings.QUOTE_TOKEN_MAX_AGE_SECONDS,
+        )
+    except signing.BadSignature:
+        return None
+    for address in (snapshot["pickup"], snapshot["dropoff"]):
+        address["latitude"] = _decimal(address["latitude"])
+        address["longitude"] = _decimal(address["longitude"])
+    for item in snapshot["items"]:
+        item["unit_price"] = Decimal(item["unit_price"])
+    for field in AMOUNT_FIELDS:
+        snapshot[field] = Decimal(snapshot[field])
+    return snapshot
+
+
+def snapshot_matches_request(snapshot, data):
+    """Whether the request body asks for the same order the token priced."""
+    try:
+        requested = sorted((int(item["inventory_item_id"]), int(item["quantity"])) for item in data["items"])
+        return (
+            int(data["merchant_branch_id"]) == snapshot["merchant_branch_id"]
+            and int(data["dropoff_address_id"]) == snapshot["dropoff_address_id"]
+            and data.get("vehicle_type", RiderProfile.VehicleType.BIKE) == snapshot["vehicle_type"]
+            and requested == sorted((item["inventory_item_id"], item["quantity"]) for item in snapshot["items"])
+        )
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def inventory_is_current(snapshot):
+    versions = dict(
+        InventoryItem.objects.filter(
+            id__in=[item["inventory_item_id"] for item in snapshot["items"]],
+            branch_id=snapshot["merchant_branch_id"],
+            is_active=True,
+        ).values_list("id", "version")
+    )
+    return all(versions.get(item["inventory_item_id"]) == item["version"] for item in snapshot["items"])
@@ -0,0 +1,138 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InventoryItem, StockReservation
+
+
+class InsufficientStock(Exception):
+    def __init__(self, inventory_item_id):
+        super().__init__(inventory_item_id)
+        self.inventory_item_id = inventory_item_id
+
+
+def _take_sql(item_count):
+    values = ", ".join(["(%s, %s)"] * item_count)
+    item_table = InventoryItem._meta.db_table
+    return f"""
+WITH basket (item_id, quantity) AS (VALUES {values})
+UPDATE {item_table} AS item
+SET stock = item.stock - basket.quantity
+FROM basket
+WHERE item.id = basket.item_id AND item.stock >= basket.quantity
+RETURNING id
+"""
+
+
+def _take(quantities):
+    """Decrement stock for ``{inventory_item_id: quantity}`` in one conditional UPDATE, or raise ``InsufficientStock``.
+
+    The stock check lives in the UPDATE's WHERE clause, so there is no
+    read-then-write window and no separate locking read; each row is locked
+    only by its own decrement. Must run inside the caller's transaction, which
+    rolls back the items that were taken when another one runs short.
+    """
+    item_ids = sorted(quantities)
+    params = [value for item_id in item_ids for value in (item_id, quantities[item_id])]
+    with connection.cursor() as cursor:
+        cursor.execute(_take_sql(len(item_ids)), params)
+        taken = {row[0] for row in cursor.fetchall()}
+    for inventory_item_id in item_ids:
+        if inventory_item_id not in taken:
+            raise InsufficientStock(inventory_item_id)
+
+
+def _restock(rows):
+    quantities = defaultdict(int)
+    for inventory_item_id, quantity in rows:
+        quantities[inventory_item_id] += quantity
+    for inventory_item_id in sorted(quantities):
+        InventoryItem.objects.filter(id=inventory_item_id).update(stock=F("stock") + quantities[inventory_item_id])
+
+
+def reserve_stock(order, line_items, now=None):
+    """Hold stock for ``(inventory_item_id, quantity)`` pairs until ``STOCK_RESERVATION_TTL_SECONDS`` from now.
+
+    Raises ``InsufficientStock`` without taking anything if any item runs short.
+    """
+    quantities = defaultdict(int)
+    for inventory_item_id, quantity in line_items:
+        quantities[inventory_item_id] += quantity
+    expires_at = (now or timezone.now()) + timedelta(seconds=settings.STOCK_RESERVATION_TTL_SECONDS)
+    with transaction.atomic():
+        _take(quantities)
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(
+                    order=order,
+                    inventory_item_id=inventory_item_id,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+                for inventory_item_id, quantity in quantities.items()
+            ]
+        )
+
+
+def commit_reservations(order):
+    """Make the order's live holds permanent.
+
+    Released holds, whether expired or canceled, are never taken again; if the
+    order has any, ``InsufficientStock`` is raised and nothing is committed.
+    """
+    with transaction.atomic():
+        # Locks the held rows first, so the sweeper skips them from here on.
+        StockReservation.objects.filter(order=order, status=StockReservation.Status.HELD).update(
+            status=StockReservation.Status.COMMITTED
+        )
+        released = (
+            StockReservation.objects.filter(order=order, status=StockReservation.Status.RELEASED)
+            .values_list("inventory_item_id", flat=True)
+            .first()
+        )
+        if released is not None:
+            raise InsufficientStock(released)
+
+
+def release_reservations(order):
+    """Return all stock held or committed for a canceled order."""
+    with transaction.atomic():
+        rows = list(
+            StockReservation.objects.select_for_update()
+            .filter(
+                order=order,
+                status__in=(StockReservation.Status.HELD, StockReservation.Status.COMMITTED),
+            )
+            .values_list("id", "inventory_item_id", "quantity")
+        )
+        StockReservation.objects.filter(id__in=[row[0] for row in rows]).update(
+            status=StockReservation.Status.RELEASED
+        )
+        _restock(row[1:] for row in rows)
+
+
+def release_expired_reservations(now=None, batch_size=None):
+    """Return stock for holds past their expiry. Returns the number of holds released."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.STOCK_RESERVATION_SWEEP_BATCH
+    released = 0
+    while True:
+        with transaction.atomic():
+            # Holds being committed right now are locked and skipped.
+            rows = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(status=StockReservation.Status.HELD, expires_at__lte=now)
+                .order_by("expires_at")
+                .values_list("id", "inventory_item_id", "quantity")[:batch_size]
+            )
+            StockReservation.objects.filter(id__in=[row[0] for row in rows]).update(
+                status=StockReservation.Status.RELEASED
+            )
+            _restock(row[1:] for row in rows)
+        released += len(rows)
+        if len(rows) < batch_size:
+            return released
@@ -1,9 +1,10 @@
 from django.urls import path
 
-from .consumers import NotificationsConsumer, OrderChatConsumer, OrderTrackingConsumer
+from .consumers import NotificationsConsumer, OrderChatConsumer, OrderTrackingConsumer, RiderLocationConsumer
 
 websocket_urlpatterns = [
     path("ws/notifications/", NotificationsConsumer.as_asgi()),
     path("ws/orders/<int:order_id>/tracking/", OrderTrackingConsumer.as_asgi()),
     path("ws/orders/<int:order_id>/chat/", OrderChatConsumer.as_asgi()),
+    path("ws/rider/location/", RiderLocationConsumer.as_asgi()),
 ]
@@ -1,7 +1,10 @@
+import decimal
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import models
 from django.db.models import Prefetch
+from django.utils import timezone
 from rest_framework import serializers
 
 from .models import (
@@ -9,6 +12,7 @@ from .models import (
     ChatMessage,
     InventoryItem,
     MerchantBranch,
+    Notification,
     Order,
     OrderItem,
     OrderTrackingEvent,
@@ -16,10 +20,58 @@ from .models import (
     PaymentTransaction,
     RiderAvailability,
     RiderEarnings,
-    RiderLocation,
     RiderProfile,
 )
 from .pricing import calculate_delivery_fee
+from .quotes import inventory_is_current, load_quote, snapshot_matches_request, snapshot_quote
+from .reservations import InsufficientStock, reserve_stock
+
+
+class SparseFieldsMixin:
+    field_profiles = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD"):
+            return
+        selected = self.requested_fields(request)
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        params = request.query_params
+        declared = list(cls.Meta.fields)
+        selected = declared
+
+        profile = params.get("profile")
+        if profile:
+            if profile not in cls.field_profiles:
+                raise serializers.ValidationError({"profile": f"Unknown profile '{profile}'."})
+            selected = cls.field_profiles[profile] or declared
+
+        fields = _split_param(params.get("fields"))
+        omit = _split_param(params.get("omit"))
+        for param, names in (("fields", fields), ("omit", omit)):
+            unknown = names - set(declared)
+            if unknown:
+                raise serializers.ValidationError({param: f"Unknown fields: {', '.join(sorted(unknown))}."})
+        if fields:
+            selected = [name for name in declared if name in fields]
+        if omit:
+            selected = [name for name in selected if name not in omit]
+
+        if len(selected) == len(declared):
+            return None
+        return [name for name in declared if name in selected]
+
+
+def _split_param(value):
+    if not value:
+        return set()
+    return {name.strip() for name in value.split(",") if name.strip()}
 
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -51,9 +103,14 @@ class OrderTrackingEventSerializer(serializers.ModelSerializer):
         fields = ("id", "status", "latitude", "longitude", "created_at")
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
 
+    field_profiles = {
+        "summary": ("id", "status", "merchant_branch", "rider", "total", "created_at"),
+        "full": None,
+    }
+
     class Meta:
         model = Order
         fields = (
@@ -92,6 +149,22 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         fields = ("id", "order", "sender", "recipient", "message", "created_at")
 
 
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ("id", "notification_type", "payload", "is_read", "created_at")
+
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs["all"] == ("ids" in attrs):
+            raise serializers.ValidationError("Pass either ids or all.")
+        return attrs
+
+
 class RiderAvailabilitySerializer(serializers.ModelSerializer):
     class Meta:
         model = RiderAvailability
@@ -99,11 +172,10 @@ class RiderAvailabilitySerializer(serializers.ModelSerializer):
         read_only_fields = ("updated_at",)
 
 
-class RiderLocationSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = RiderLocation
-        fields = ("latitude", "longitude", "updated_at")
-        read_only_fields = ("updated_at",)
+class RiderLocationSerializer(serializers.Serializer):
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    updated_at = serializers.DateTimeField(read_only=True)
 
 
 class RiderEarningsSerializer(serializers.ModelSerializer):
@@ -127,11 +199,6 @@ class RiderStatusUpdateSerializer(serializers.Serializer):
 class RiderAcceptOrderSerializer(serializers.Serializer):
     order_id = serializers.IntegerField()
 
-    def validate_order_id(self, value):
-        if not Order.objects.filter(id=value, status=Order.Status.CONFIRMED, rider__isnull=True).exists():
-            raise serializers.ValidationError("Order is not available.")
-        return value
-
 
 class MerchantBranchSerializer(serializers.ModelSerializer):
     class Meta:
@@ -150,7 +217,12 @@ class MerchantBranchSerializer(serializers.ModelSerializer):
         )
 
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+class InventoryItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    field_profiles = {
+        "summary": ("id", "name", "price", "stock", "is_active"),
+        "full": None,
+    }
+
     class Meta:
         model = InventoryItem
         fields = ("id", "branch", "name", "description", "price", "stock", "is_active")
@@ -165,10 +237,15 @@ class MerchantOrderStatusSerializer(serializers.Serializer):
     )
 
 
-class AdminUserSerializer(serializers.ModelSerializer):
+class AdminUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     rider_profile_id = serializers.SerializerMethodField()
     rider_kyc_status = serializers.SerializerMethodField()
 
+    field_profiles = {
+        "summary": ("id", "username", "role", "is_suspended"),
+        "full": None,
+    }
+
     class Meta:
         model = get_user_model()
         fields = (
@@ -215,47 +292,109 @@ class AdminDeliveryFeeSerializer(serializers.Serializer):
     delivery_fee = serializers.DecimalField(max_digits=10, decimal_places=2)
 
 
+class AdminAnnouncementSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    body = serializers.CharField(max_length=2000)
+
+
+class RateCardZoneSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=120)
+    latitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    longitude = serializers.DecimalField(max_digits=9, decimal_places=6)
+    radius_km = serializers.DecimalField(max_digits=8, decimal_places=3, min_value=Decimal("0"))
+    multiplier = serializers.DecimalField(
+        max_digits=6, decimal_places=3, min_value=Decimal("0"), default=Decimal("1")
+    )
+    surcharge = serializers.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0"))
+
+
+class AdminRateCardSerializer(serializers.Serializer):
+    base_fee = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0"))
+    per_km = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0"))
+    min_fee = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0"), required=False, allow_null=True
+    )
+    max_fee = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0"), required=False, allow_null=True
+    )
+    vehicles = serializers.DictField(
+        child=serializers.DecimalField(max_digits=6, decimal_places=3, min_value=Decimal("0")), required=False
+    )
+    zones = RateCardZoneSerializer(many=True, required=False)
+
+    def validate_vehicles(self, value):
+        unknown = set(value) - set(RiderProfile.VehicleType.values)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown vehicle types: {', '.join(sorted(unknown))}.")
+        return value
+
+    def validate(self, attrs):
+        min_fee = attrs.get("min_fee")
+        max_fee = attrs.get("max_fee")
+        if min_fee is not None and max_fee is not None and min_fee > max_fee:
+            raise serializers.ValidationError({"max_fee": "Must be at least min_fee."})
+        return attrs
+
+
 class OrderItemQuoteSerializer(serializers.Serializer):
     inventory_item_id = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1)
 
-    def validate_inventory_item_id(self, value):
-        if not InventoryItem.objects.filter(id=value, is_active=True).exists():
-            raise serializers.ValidationError("Invalid inventory item.")
-        return value
+
+def load_basket(branch_id, item_requests):
+    """Fetch the branch and requested inventory items in one query, or raise ``ValidationError``."""
+    item_ids = [item["inventory_item_id"] for item in item_requests]
+    inventory_items = {
+        item.id: item
+        for item in InventoryItem.objects.select_related("branch").filter(id__in=item_ids, is_active=True)
+    }
+    if len(inventory_items) != len(set(item_ids)):
+        # Same per-line shape as a nested field error on ``items``.
+        raise serializers.ValidationError(
+            {
+                "items": [
+                    {} if item_id in inventory_items else {"inventory_item_id": ["Invalid inventory item."]}
+                    for item_id in item_ids
+                ]
+            }
+        )
+    branch = next((item.branch for item in inventory_items.values() if item.branch_id == branch_id), None)
+    if branch is None:
+        branch = MerchantBranch.objects.filter(id=branch_id).first()
+    if branch is None:
+        raise serializers.ValidationError({"merchant_branch_id": "Invalid branch."})
+    if len(item_ids) != len(inventory_items) or any(item.branch_id != branch_id for item in inventory_items.values()):
+        raise serializers.ValidationError({"items": "Items must belong to the selected branch."})
+    return branch, inventory_items
 
 
 class OrderQuoteRequestSerializer(serializers.Serializer):
     merchant_branch_id = serializers.IntegerField()
     dropoff_address_id = serializers.IntegerField()
     items = OrderItemQuoteSerializer(many=True)
+    vehicle_type = serializers.ChoiceField(
+        choices=RiderProfile.VehicleType.choices, default=RiderProfile.VehicleType.BIKE
+    )
 
     def validate(self, attrs):
-        branch_id = attrs.get("merchant_branch_id")
-        if not MerchantBranch.objects.filter(id=branch_id).exists():
-            raise serializers.ValidationError({"merchant_branch_id": "Invalid branch."})
+        if "signed_quote" in attrs:
+            return attrs
+        attrs["branch"], attrs["inventory_items"] = load_basket(attrs["merchant_branch_id"], attrs["items"])
         return attrs
 
     def build_quote(self, customer_profile):
-        branch = MerchantBranch.objects.get(id=self.validated_data["merchant_branch_id"])
+        item_requests = self.validated_data["items"]
+        if "branch" in self.validated_data:
+            branch = self.validated_data["branch"]
+            inventory_items = self.validated_data["inventory_items"]
+        else:
+            branch, inventory_items = load_basket(self.validated_data["merchant_branch_id"], item_requests)
         address = Address.objects.filter(
             id=self.validated_data["dropoff_address_id"], customer=customer_profile
         ).first()
         if not address:
             raise serializers.ValidationError({"dropoff_address_id": "Address not found."})
 
-        item_requests = self.validated_data["items"]
-        inventory_items = {
-            item.id: item
-            for item in InventoryItem.objects.filter(
-                id__in=[item["inventory_item_id"] for item in item_requests],
-                branch=branch,
-                is_active=True,
-            )
-        }
-        if len(inventory_items) != len(item_requests):
-            raise serializers.ValidationError({"items": "Items must belong to the selected branch."})
-
         line_items = []
         subtotal = Decimal("0.00")
         for item in item_requests:
@@ -272,7 +411,12 @@ class OrderQuoteRequestSerializer(serializers.Serializer):
             )
             subtotal += unit_price * quantity
 
-        delivery_fee = calculate_delivery_fee(subtotal)
+        delivery_fee = calculate_delivery_fee(
+            subtotal,
+            pickup=(branch.latitude, branch.longitude),
+            dropoff=(address.latitude, address.longitude),
+            vehicle_type=self.validated_data["vehicle_type"],
+        )
         total = subtotal + delivery_fee
 
         return {
@@ -287,31 +431,49 @@ class OrderQuoteRequestSerializer(serializers.Serializer):
 
 class OrderCreateSerializer(OrderQuoteRequestSerializer):
     payment_provider = serializers.ChoiceField(choices=Payment.Provider.choices)
+    quote_token = serializers.CharField(required=False)
+
+    def to_internal_value(self, data):
+        token = data.get("quote_token")
+        snapshot = load_quote(token) if isinstance(token, str) else None
+        if snapshot is None or not snapshot_matches_request(snapshot, data):
+            return super().to_internal_value(data)
+        # The signed quote already validated the branch, address and items.
+        try:
+            payment_provider = self.fields["payment_provider"].run_validation(
+                data.get("payment_provider", serializers.empty)
+            )
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({"payment_provider": exc.detail})
+        return {
+            "merchant_branch_id": snapshot["merchant_branch_id"],
+            "dropoff_address_id": snapshot["dropoff_address_id"],
+            "items": [
+                {"inventory_item_id": item["inventory_item_id"], "quantity": item["quantity"]}
+                for item in snapshot["items"]
+            ],
+            "vehicle_type": snapshot["vehicle_type"],
+            "payment_provider": payment_provider,
+            "signed_quote": snapshot,
+        }
 
-    def create_order(self, customer_profile):
+    def order_quote(self, customer_profile):
+        snapshot = self.validated_data.get("signed_quote")
+        if snapshot and snapshot["customer_id"] == customer_profile.id and inventory_is_current(snapshot):
+            return snapshot
         quote = self.build_quote(customer_profile)
-        branch = quote["branch"]
-        address = quote["dropoff_address"]
+        return snapshot_quote(quote, customer_profile, self.validated_data["vehicle_type"])
+
+    def create_order(self, customer_profile):
+        quote = self.order_quote(customer_profile)
+        pickup = quote["pickup"]
+        dropoff = quote["dropoff"]
 
         order = Order.objects.create(
             customer=customer_profile,
-            merchant_branch=branch,
-            pickup_address_line1=branch.address_line1,
-            pickup_address_line2=branch.address_line2,
-            pickup_city=branch.city,
-            pickup_state=branch.state,
-            pickup_postal_code=branch.postal_code,
-            pickup_country=branch.country,
-            pickup_latitude=branch.latitude,
-            pickup_longitude=branch.longitude,
-            dropoff_address_line1=address.address_line1,
-            dropoff_address_line2=address.address_line2,
-            dropoff_city=address.city,
-            dropoff_state=address.state,
-            dropoff_postal_code=address.postal_code,
-            dropoff_country=address.country,
-            dropoff_latitude=address.latitude,
-            dropoff_longitude=address.longitude,
+            merchant_branch_id=quote["merchant_branch_id"],
+            **{f"pickup_{field}": value for field, value in pickup.items()},
+            **{f"dropoff_{field}": value for field, value in dropoff.items()},
             subtotal=quote["subtotal"],
             delivery_fee=quote["delivery_fee"],
             total=quote["total"],
@@ -321,7 +483,7 @@ class OrderCreateSerializer(OrderQuoteRequestSerializer):
             [
                 OrderItem(
                     order=order,
-                    inventory_item=item["inventory_item"],
+                    inventory_item_id=item["inventory_item_id"],
                     name=item["name"],
                     quantity=item["quantity"],
                     unit_price=item["unit_price"],
@@ -346,6 +508,11 @@ class OrderCreateSerializer(OrderQuoteRequestSerializer):
 
         OrderTrackingEvent.objects.create(order=order, status=Order.Status.CREATED)
 
+        try:
+            reserve_stock(order, [(item["inventory_item_id"], item["quantity"]) for item in quote["items"]])
+        except InsufficientStock as exc:
+            raise serializers.ValidationError({"items": f"Inventory item {exc.inventory_item_id} is out of stock."})
+
         return order
 
 
@@ -353,7 +520,96 @@ class OrderConfirmSerializer(serializers.Serializer):
     provider_reference = serializers.CharField(required=False, allow_blank=True)
 
 
-def prefetch_orders(queryset):
+def prefetch_orders(queryset, fields=None):
+    if fields is not None and "items" not in fields:
+        return queryset
     return queryset.prefetch_related(
-        Prefetch("items", queryset=OrderItem.objects.select_related("inventory_item"))
+        Prefetch("items", queryset=OrderItem.objects.select_related("inventory_item").order_by("id"))
     )
+
+
+def _decimal_formatter(field):
+    exponent = Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    context.prec = field.max_digits
+
+    def format_decimal(value):
+        return "{:f}".format(value.quantize(exponent, context=context))
+
+    return format_decimal
+
+
+def _datetime_formatter(field):
+    def format_datetime(value):
+        text = value.astimezone(timezone.get_current_timezone()).isoformat()
+        if text.endswith("+00:00"):
+            return text[:-6] + "Z"
+        return text
+
+    return format_datetime
+
+
+def _row_layout(model, field_names):
+    layout = []
+    for name in field_names:
+        field = model._meta.get_field(name)
+        formatter = None
+        if isinstance(field, models.DecimalField):
+            formatter = _decimal_formatter(field)
+        elif isinstance(field, models.DateTimeField):
+            formatter = _datetime_formatter(field)
+        layout.append((name, field.attname, formatter))
+    return layout
+
+
+ORDER_ROW_LAYOUT = _row_layout(Order, [name for name in OrderSerializer.Meta.fields if name != "items"])
+ORDER_ITEM_ROW_LAYOUT = _row_layout(OrderItem, OrderItemSerializer.Meta.fields)
+
+
+def _select_layout(layout, fields):
+    if fields is None:
+        return layout
+    return [entry for entry in layout if entry[0] in fields]
+
+
+def order_rows(queryset, fields=None):
+    columns = [column for _, column, _ in _select_layout(ORDER_ROW_LAYOUT, fields)]
+    # Keyset pagination and item lookup need these even when they are not rendered.
+    for column in ("id", "created_at"):
+        if column not in columns:
+            columns.append(column)
+    return queryset.prefetch_related(None).values(*columns)
+
+
+def _format_row(row, layout):
+    data = {}
+    for name, column, formatter in layout:
+        value = row[column]
+        if formatter is not None and value is not None:
+            value = formatter(value)
+        data[name] = value
+    return data
+
+
+def render_order_rows(rows, fields=None):
+    """Read-only equivalent of ``OrderSerializer(many=True).data`` for rows from ``order_rows``."""
+    rows = list(rows)
+    layout = _select_layout(ORDER_ROW_LAYOUT, fields)
+    include_items = fields is None or "items" in fields
+    items_by_order = {row["id"]: [] for row in rows}
+    if include_items and items_by_order:
+        item_rows = (
+            OrderItem.objects.filter(order_id__in=list(items_by_order))
+            .order_by("id")
+            .values("order_id", *[column for _, column, _ in ORDER_ITEM_ROW_LAYOUT])
+        )
+        for item in item_rows:
+            items_by_order[item["order_id"]].append(_format_row(item, ORDER_ITEM_ROW_LAYOUT))
+
+    rendered = []
+    for row in rows:
+        data = _format_row(row, layout)
+        if include_items:
+            data["items"] = items_by_order[row["id"]]
+        rendered.append(data)
+    return rendered
@@ -1,28 +1,44 @@
 from asgiref.sync import async_to_sync
 from celery import shared_task
 from channels.layers import get_channel_layer
+from django.conf import settings
 
-from .models import Notification, Order, OrderTrackingEvent
+from .models import Order, OrderTrackingEvent
+from .notifications import broadcast_notification, notify_users
+from .positions import flush_positions
+from .reservations import release_expired_reservations
+
+
+def send_tracking_event(payload):
+    async_to_sync(get_channel_layer().group_send)(
+        f"order_{payload['order_id']}_tracking",
+        {"type": "tracking.message", "payload": payload},
+    )
 
 
+@shared_task
+def publish_order_event(event, recipient_ids):
+    """Push a tracking event and notify its recipients from the payload built by ``enqueue_order_events``."""
+    send_tracking_event(event)
+    notify_users(recipient_ids, "ORDER_STATUS", {"order_id": event["order_id"], "status": event["status"]})
+
+
+# The two tasks below re-read the database; they remain for messages queued before publish_order_event.
 @shared_task
 def send_order_tracking_event(order_id, event_id):
     try:
         event = OrderTrackingEvent.objects.get(id=event_id, order_id=order_id)
     except OrderTrackingEvent.DoesNotExist:
         return
-    payload = {
-        "id": event.id,
-        "order_id": event.order_id,
-        "status": event.status,
-        "latitude": str(event.latitude) if event.latitude is not None else None,
-        "longitude": str(event.longitude) if event.longitude is not None else None,
-        "created_at": event.created_at.isoformat(),
-    }
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"order_{order_id}_tracking",
-        {"type": "tracking.message", "payload": payload},
+    send_tracking_event(
+        {
+            "id": event.id,
+            "order_id": event.order_id,
+            "status": event.status,
+            "latitude": str(event.latitude) if event.latitude is not None else None,
+            "longitude": str(event.longitude) if event.longitude is not None else None,
+            "created_at": event.created_at.isoformat(),
+        }
     )
 
 
@@ -37,26 +53,69 @@ def send_order_status_notifications(order_id, status):
     except Order.DoesNotExist:
         return
 
-    recipients = [order.customer.user]
+    recipients = [order.customer.user_id]
     if order.rider:
-        recipients.append(order.rider.user)
+        recipients.append(order.rider.user_id)
     if order.merchant_branch and order.merchant_branch.merchant:
-        recipients.append(order.merchant_branch.merchant.user)
-
-    channel_layer = get_channel_layer()
-    for user in recipients:
-        notification = Notification.objects.create(
-            user=user,
-            notification_type="ORDER_STATUS",
-            payload={"order_id": order.id, "status": status},
-        )
-        payload = {
-            "id": notification.id,
-            "type": notification.notification_type,
-            "payload": notification.payload,
-            "created_at": notification.created_at.isoformat(),
-        }
-        async_to_sync(channel_layer.group_send)(
-            f"user_{user.id}_notifications",
-            {"type": "notification.message", "payload": payload},
-        )
+        recipients.append(order.merchant_branch.merchant.user_id)
+    notify_users(recipients, "ORDER_STATUS", {"order_id": order.id, "status": status})
+
+
+@shared_task
+def dispatch_orders():
+    from .dispatch import run_dispatch
+
+    if not settings.DISPATCH_ENABLED:
+        return 0
+    return run_dispatch()
+
+
+@shared_task
+def flush_rider_locations():
+    return flush_positions()
+
+
+@shared_task
+def flush_rider_trajectories():
+    from .trajectories import flush_trajectories
+
+    return flush_trajectories()
+
+
+@shared_task
+def prune_rider_trajectories():
+    from .trajectories import prune_trajectories
+
+    deleted, compacted = prune_trajectories()
+    return {"deleted": deleted, "compacted": compacted}
+
+
+@shared_task
+def fit_eta_model():
+    from .eta import refresh_eta_model
+
+    return refresh_eta_model().sample_count
+
+
+@shared_task
+def release_stock_reservations():
+    return release_expired_reservations()
+
+
+@shared_task
+def broadcast_announcement(title, body):
+    return broadcast_notification("ANNOUNCEMENT", {"title": title, "body": body})
+
+
+@shared_task
+def create_table_partitions():
+    from .partitions import ensure_partitions
+
+    return ensure_partitions()
+
+
+@shared_task
+def archive_table_partitions():
+    from .partitions import archive_partitions
+
+    return archive_partitions()
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from delivery.models import (
+    Address,
+    CustomerProfile,
+    InventoryItem,
+    MerchantBranch,
+    MerchantProfile,
+    Order,
+    RiderProfile,
+)
+
+User = get_user_model()
+
+
+def make_user(username, role):
+    return User.objects.create_user(username=username, email=f"{username}@example.com", role=role)
+
+
+def make_customer(username="customer"):
+    return CustomerProfile.objects.create(user=make_user(username, User.Roles.CUSTOMER))
+
+
+def make_merchant(username="merchant"):
+    return MerchantProfile.objects.create(user=make_user(username, User.Roles.MERCHANT), business_name=username)
+
+
+def make_rider(username="rider", kyc_status="VERIFIED"):
+    return RiderProfile.objects.create(user=make_user(username, User.Roles.RIDER), kyc_status=kyc_status)
+
+
+def make_branch(merchant, name="Branch"):
+    return MerchantBranch.objects.create(
+        merchant=merchant,
+        name=name,
+        address_line1="1 Market St",
+        city="San Francisco",
+        latitude=Decimal("37.774900"),
+        longitude=Decimal("-122.419400"),
+    )
+
+
+def make_items(branch, count, stock=100):
+    return InventoryItem.objects.bulk_create(
+        [
+            InventoryItem(branch=branch, name=f"Item {index}", price=Decimal("2.50"), stock=stock)
+            for index in range(count)
+        ]
+    )
+
+
+def make_address(customer):
+    return Address.objects.create(
+        customer=customer,
+        address_line1="2 Mission St",
+        city="San Francisco",
+        latitude=Decimal("37.780000"),
+        longitude=Decimal("-122.410000"),
+    )
+
+
+def build_order(customer, branch, **fields):
+    values = {
+        "customer": customer,
+        "merchant_branch": branch,
+        "status": Order.Status.CONFIRMED,
+        "pickup_address_line1": branch.address_line1,
+        "pickup_city": branch.city,
+        "pickup_latitude": branch.latitude,
+        "pickup_longitude": branch.longitude,
+        "dropoff_address_line1": "2 Mission St",
+        "dropoff_city": "San Francisco",
+        "subtotal": Decimal("10.00"),
+        "delivery_fee": Decimal("5.00"),
+        "total": Decimal("15.00"),
+    }
+    values.update(fields)
+    return Order(**values)
+
+
+def make_admin(username="admin"):
+    return make_user(username, User.Roles.ADMIN)
+
+
+def api_client(profile):
+    """Client authenticated as ``profile``'s user, or as ``profile`` itself when given a user."""
+    client = APIClient()
+    client.force_authenticate(getattr(profile, "user", profile))
+    return client
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from delivery.consumers import RiderLocationConsumer
+
+
+class RiderLocationFlushTests(SimpleTestCase):
+    def consumer(self, pending):
+        consumer = RiderLocationConsumer()
+        consumer.rider_id = 7
+        consumer.pending = pending
+        return consumer
+
+    async def test_failed_write_keeps_the_frame_for_the_next_flush(self):
+        consumer = self.consumer((1, 2))
+        failing = mock.patch(
+            "delivery.consumers.ingest_rider_position", side_effect=[ConnectionError("redis down"), None]
+        )
+        with failing as ingest, self.assertLogs("delivery.consumers", "ERROR"):
+            await consumer.flush()
+            self.assertEqual(consumer.pending, (1, 2))
+            await consumer.flush()
+        self.assertEqual(ingest.call_args_list, [mock.call(7, 1, 2), mock.call(7, 1, 2)])
+        self.assertIsNone(consumer.pending)
+
+    async def test_newer_frame_wins_over_a_failed_one(self):
+        consumer = self.consumer((1, 2))
+
+        def fail_after_new_frame(*args):
+            consumer.pending = (3, 4)
+            raise ConnectionError("redis down")
+
+        failing = mock.patch("delivery.consumers.ingest_rider_position", side_effect=fail_after_new_frame)
+        with failing, self.assertLogs("delivery.consumers", "ERROR"):
+            await consumer.flush()
+        self.assertEqual(consumer.pending, (3, 4))
@@ -0,0 +1,65 @@
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.throttling import ScopedRateThrottle
+
+from core.models import IdempotencyKey
+from core.settings_cache import delivery_settings
+
+from .factories import api_client, make_address, make_branch, make_customer, make_items, make_merchant
+
+
+class IdempotencyKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer()
+        cls.address = make_address(cls.customer)
+        cls.branch = make_branch(make_merchant())
+        cls.items = make_items(cls.branch, 1)
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(delivery_settings, "_ensure_listener"),
+            mock.patch.object(ScopedRateThrottle, "allow_request", return_value=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.key = str(uuid.uuid4())
+
+    def create_order(self):
+        data = {
+            "merchant_branch_id": self.branch.id,
+            "dropoff_address_id": self.address.id,
+            "payment_provider": "STRIPE",
+            "items": [{"inventory_item_id": self.items[0].id, "quantity": 1}],
+        }
+        return api_client(self.customer).post(
+            "/api/customer/orders/", data, format="json", HTTP_IDEMPOTENCY_KEY=self.key
+        )
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.create_order()
+        second = self.create_order()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.json()["id"], first.json()["id"])
+
+    def test_expired_unpurged_key_is_reused(self):
+        IdempotencyKey.objects.create(
+            user=self.customer.user,
+            key=self.key,
+            request_hash="stale",
+            status_code=201,
+            response_body={},
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        response = self.create_order()
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        record = IdempotencyKey.objects.get(user=self.customer.user, key=self.key)
+        self.assertGreater(record.expires_at, timezone.now())
+        self.assertEqual(record.response_body["id"], response.json()["id"])
@@ -0,0 +1,92 @@
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from delivery.models import Order
+from delivery.positions import POSITIONS_KEY, connection as redis_connection
+
+from .factories import api_client, build_order, make_admin, make_branch, make_customer, make_merchant, make_rider
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are Postgres-specific")
+class OrderListIndexTests(TestCase):
+    """Each order list must be served by its composite or partial index, not a scan and sort."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customers = [make_customer(f"customer{index}") for index in range(200)]
+        cls.merchants = [make_merchant(f"merchant{index}") for index in range(50)]
+        branches = [make_branch(merchant) for merchant in cls.merchants]
+        # merchants[1] runs a chain, so its list filters on several branches at once.
+        branches += [make_branch(cls.merchants[1], f"Branch {index}") for index in range(2, 5)]
+        cls.rider = make_rider()
+        cls.admin = make_admin()
+        Order.objects.bulk_create(
+            [
+                build_order(
+                    cls.customers[index % 200],
+                    branches[index // 7 % len(branches)],
+                    status=Order.Status.CONFIRMED if index % 10 == 0 else Order.Status.DELIVERED,
+                )
+                for index in range(20000)
+            ],
+            batch_size=2000,
+        )
+        with connection.cursor() as cursor:
+            # Spread orders over two weeks so the planner sees realistic created_at statistics.
+            cursor.execute("UPDATE delivery_order SET created_at = now() - id * interval '1 minute'")
+            cursor.execute("ANALYZE delivery_order")
+
+    def plan_for(self, profile, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client(profile).get(url)
+        self.assertEqual(response.status_code, 200)
+        order_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "delivery_order"' in query["sql"]
+            and "ORDER BY" in query["sql"]
+        ]
+        self.assertEqual(len(order_queries), 1, order_queries)
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {order_queries[0]}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, plan, index_name):
+        self.assertIn(index_name, plan)
+        self.assertNotIn("Seq Scan on delivery_order", plan)
+
+    def test_customer_history_uses_customer_index(self):
+        plan = self.plan_for(self.customers[0], "/api/customer/orders/history/?fields=id")
+        self.assertUsesIndex(plan, "order_customer_created_idx")
+
+    def test_plain_customer_history_uses_customer_index(self):
+        plan = self.plan_for(self.customers[0], "/api/customer/orders/history/")
+        self.assertUsesIndex(plan, "order_customer_created_idx")
+
+    def test_merchant_list_uses_branch_index(self):
+        plan = self.plan_for(self.merchants[0], "/api/merchant/orders/?fields=id")
+        self.assertUsesIndex(plan, "order_branch_created_idx")
+
+    def test_multi_branch_merchant_list_walks_created_index(self):
+        # Postgres cannot merge several branch ranges of order_branch_created_idx in
+        # order, so a chain's list reads the global index newest first and filters.
+        plan = self.plan_for(self.merchants[1], "/api/merchant/orders/?fields=id")
+        self.assertUsesIndex(plan, "order_created_id_idx")
+        self.assertIn("merchant_branch_id = ANY", plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_admin_list_uses_created_index(self):
+        plan = self.plan_for(self.admin, "/api/admin/orders/?fields=id")
+        self.assertUsesIndex(plan, "order_created_id_idx")
+        self.assertNotIn("Sort", plan)
+
+    def test_rider_feed_uses_open_order_index(self):
+        # Without a buffered position the feed is the unranked open-order list.
+        redis_connection().hdel(POSITIONS_KEY, self.rider.id)
+        api_client(self.rider).post("/api/rider/availability/", {"is_online": True}, format="json")
+        plan = self.plan_for(self.rider, "/api/rider/orders/available/?fields=id")
+        self.assertUsesIndex(plan, "order_open_created_idx")
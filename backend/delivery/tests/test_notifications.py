@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.db.models import QuerySet
+from django.test import TestCase
+from django_redis import get_redis_connection
+
+from delivery.models import Notification
+from delivery.notifications import adjust_unread_counts, mark_read, unread_count, unread_key
+
+from .factories import make_customer
+
+
+class UnreadCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_customer().user
+
+    def setUp(self):
+        self.redis = get_redis_connection("default")
+        self.redis.delete(unread_key(self.user.id))
+        self.addCleanup(self.redis.delete, unread_key(self.user.id))
+
+    def notify(self):
+        Notification.objects.create(user=self.user, notification_type="test")
+
+    def test_recount_is_cached_and_adjusted(self):
+        self.notify()
+        self.assertEqual(unread_count(self.user.id), 1)
+        self.assertEqual(self.redis.get(unread_key(self.user.id)), b"1")
+        self.notify()
+        adjust_unread_counts({self.user.id: 1})
+        self.assertEqual(unread_count(self.user.id), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_read(self.user)
+        self.assertEqual(unread_count(self.user.id), 0)
+
+    def test_change_during_recount_is_not_lost(self):
+        count = QuerySet.count
+
+        def count_then_notify(queryset):
+            # The notification commits after the recount read the table.
+            result = count(queryset)
+            self.notify()
+            adjust_unread_counts({self.user.id: 1})
+            return result
+
+        with mock.patch.object(QuerySet, "count", count_then_notify):
+            self.assertEqual(unread_count(self.user.id), 0)
+        self.assertIsNone(self.redis.get(unread_key(self.user.id)))
+        self.assertEqual(unread_count(self.user.id), 1)
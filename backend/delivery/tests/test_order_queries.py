@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.throttling import ScopedRateThrottle
+
+from core.settings_cache import delivery_settings
+
+from .factories import api_client, make_address, make_branch, make_customer, make_items, make_merchant
+
+
+class OrderQueryCountTests(TestCase):
+    """The quote and create endpoints cost the same number of queries for any basket size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer()
+        cls.address = make_address(cls.customer)
+        cls.branch = make_branch(make_merchant())
+        cls.items = make_items(cls.branch, 20)
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(delivery_settings, "_ensure_listener"),
+            mock.patch.object(ScopedRateThrottle, "allow_request", return_value=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        delivery_settings.invalidate()
+        delivery_settings.values()
+
+    def basket(self, size):
+        return {
+            "merchant_branch_id": self.branch.id,
+            "dropoff_address_id": self.address.id,
+            "items": [{"inventory_item_id": item.id, "quantity": 1} for item in self.items[:size]],
+        }
+
+    def post(self, path, data, queries):
+        client = api_client(self.customer)
+        with self.assertNumQueries(queries):
+            response = client.post(path, data, format="json")
+        self.assertLess(response.status_code, 300, response.content)
+        return response.json()
+
+    def test_quote_query_count_is_constant(self):
+        for size in (1, 20):
+            with self.subTest(items=size):
+                # Basket with its branch, then the dropoff address.
+                quote = self.post("/api/customer/orders/quote/", self.basket(size), 2)
+                self.assertEqual(len(quote["items"]), size)
+
+    def test_create_query_count_is_constant(self):
+        for size in (1, 20):
+            with self.subTest(items=size):
+                order = self.post("/api/customer/orders/", {**self.basket(size), "payment_provider": "STRIPE"}, 17)
+                self.assertEqual(len(order["items"]), size)
+
+    def test_create_from_quote_token_query_count_is_constant(self):
+        for size in (1, 20):
+            with self.subTest(items=size):
+                quote = self.post("/api/customer/orders/quote/", self.basket(size), 2)
+                data = {**self.basket(size), "payment_provider": "STRIPE", "quote_token": quote["quote_token"]}
+                self.post("/api/customer/orders/", data, 16)
+
+    def test_unknown_item_reports_per_line_errors(self):
+        data = self.basket(2)
+        data["items"].append({"inventory_item_id": 0, "quantity": 1})
+        response = api_client(self.customer).post("/api/customer/orders/quote/", data, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {"items": [{}, {}, {"inventory_item_id": ["Invalid inventory item."]}]},
+        )
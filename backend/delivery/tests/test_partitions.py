@@ -0,0 +1,99 @@
+import csv
+import gzip
+import os
+import tempfile
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from delivery.models import Notification
+from delivery.notifications import unread_key
+from delivery.partitions import (
+    add_months,
+    archive_partitions,
+    create_partition,
+    default_partition_name,
+    ensure_partitions,
+    list_partitions,
+    month_start,
+    partition_name,
+)
+
+from .factories import make_customer
+
+TABLE = Notification._meta.db_table
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "declarative partitioning is Postgres-only")
+class PartitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = make_customer("reader").user
+        cls.other = make_customer("other").user
+
+    def setUp(self):
+        self.redis = get_redis_connection("default")
+        self.keys = [unread_key(self.reader.id), unread_key(self.other.id)]
+        self.redis.delete(*self.keys)
+        self.addCleanup(self.redis.delete, *self.keys)
+        self.current = month_start(timezone.now())
+
+    def seed(self, user, month, is_read=False):
+        notification = Notification.objects.create(user=user, notification_type="test", is_read=is_read)
+        Notification.objects.filter(id=notification.id).update(created_at=month.replace(day=15))
+        return notification.id
+
+    def partition_of(self, notification_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {TABLE} WHERE id = %s", [notification_id])
+            return cursor.fetchone()[0]
+
+    def partitions(self):
+        with connection.cursor() as cursor:
+            return list_partitions(cursor, TABLE)
+
+    def test_ensure_partitions_premakes_months_once(self):
+        later = add_months(self.current, 24)
+        created = ensure_partitions(now=later, months_ahead=2)
+        self.assertIn(partition_name(TABLE, add_months(later, 2)), created)
+        self.assertTrue({add_months(later, offset) for offset in range(3)} <= set(self.partitions()))
+        self.assertEqual(ensure_partitions(now=later, months_ahead=2), [])
+
+    def test_rows_outside_partitions_land_in_default_and_move_out(self):
+        later = add_months(self.current, 36)
+        notification_id = self.seed(self.reader, later)
+        self.assertEqual(self.partition_of(notification_id), default_partition_name(TABLE))
+        ensure_partitions(now=later, months_ahead=0)
+        self.assertEqual(self.partition_of(notification_id), partition_name(TABLE, later))
+        self.assertEqual(Notification.objects.filter(id=notification_id).count(), 1)
+
+    def test_archive_exports_drops_and_resets_unread_counters(self):
+        old = add_months(self.current, -24)
+        with connection.cursor() as cursor:
+            create_partition(cursor, TABLE, old)
+        archived_ids = {
+            self.seed(self.reader, old),
+            self.seed(self.other, old, is_read=True),
+        }
+        kept_id = self.seed(self.reader, self.current)
+        with connection.cursor() as cursor:
+            # Fire the deferred FK checks now; Postgres cannot drop a table with pending trigger events.
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        self.redis.set(self.keys[0], 2)
+        self.redis.set(self.keys[1], 0)
+
+        with tempfile.TemporaryDirectory() as archive_dir, self.captureOnCommitCallbacks(execute=True):
+            paths = archive_partitions(archive_dir=archive_dir)
+            name = partition_name(TABLE, old)
+            self.assertIn(os.path.join(archive_dir, f"{name}.csv.gz"), paths)
+            with gzip.open(os.path.join(archive_dir, f"{name}.csv.gz"), "rt") as handle:
+                rows = list(csv.DictReader(handle))
+
+        self.assertEqual({int(row["id"]) for row in rows}, archived_ids)
+        self.assertNotIn(old, self.partitions())
+        self.assertEqual(set(Notification.objects.values_list("id", flat=True)), {kept_id})
+        self.assertIsNone(self.redis.get(self.keys[0]))
+        self.assertEqual(self.redis.get(self.keys[1]), b"0")
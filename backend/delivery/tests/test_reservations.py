@@ -0,0 +1,124 @@
+import threading
+import unittest
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from delivery.models import InventoryItem, Order, StockReservation
+from delivery.reservations import (
+    InsufficientStock,
+    commit_reservations,
+    release_reservations,
+    reserve_stock,
+)
+
+from .factories import build_order, make_branch, make_customer, make_items, make_merchant
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "needs row locks and concurrent connections")
+class ConcurrentReservationTests(TransactionTestCase):
+    """Hundreds of orders race for one SKU through a pool of connections, as the storefront would."""
+
+    orders = 400
+    workers = 50
+    stock = 150
+
+    def test_concurrent_holds_never_oversell(self):
+        customer = make_customer()
+        branch = make_branch(make_merchant())
+        item = make_items(branch, 1, stock=self.stock)[0]
+        orders = Order.objects.bulk_create([build_order(customer, branch) for _ in range(self.orders)])
+
+        barrier = threading.Barrier(self.workers)
+        outcomes = []
+        lock = threading.Lock()
+
+        def reserve(batch):
+            try:
+                connection.ensure_connection()
+                barrier.wait()
+                for order in batch:
+                    try:
+                        reserve_stock(order, [(item.id, 1)])
+                        outcome = "held"
+                    except InsufficientStock:
+                        outcome = "short"
+                    with lock:
+                        outcomes.append(outcome)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=reserve, args=(orders[index :: self.workers],)) for index in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(outcomes), self.orders)
+        self.assertEqual(outcomes.count("held"), self.stock)
+        item.refresh_from_db()
+        self.assertEqual(item.stock, 0)
+        self.assertEqual(
+            StockReservation.objects.filter(inventory_item=item, status=StockReservation.Status.HELD).count(),
+            self.stock,
+        )
+
+
+class ReservationLifecycleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer()
+        cls.branch = make_branch(make_merchant())
+
+    def setUp(self):
+        self.items = make_items(self.branch, 2, stock=5)
+        self.order = build_order(self.customer, self.branch)
+        self.order.save()
+
+    def stock(self):
+        return list(
+            InventoryItem.objects.filter(id__in=[item.id for item in self.items])
+            .order_by("id")
+            .values_list("stock", flat=True)
+        )
+
+    def test_hold_touches_stock_in_one_conditional_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            reserve_stock(self.order, [(self.items[1].id, 1), (self.items[0].id, 2)])
+        item_table = InventoryItem._meta.db_table
+        touching = [query["sql"] for query in queries if item_table in query["sql"]]
+        self.assertEqual(len(touching), 1)
+        self.assertTrue(touching[0].lstrip().startswith("WITH basket"))
+        self.assertNotIn("FOR UPDATE", touching[0])
+        self.assertEqual(self.stock(), [3, 4])
+
+    def test_short_basket_takes_nothing(self):
+        with self.assertRaises(InsufficientStock) as caught:
+            reserve_stock(self.order, [(self.items[0].id, 2), (self.items[1].id, 6)])
+        self.assertEqual(caught.exception.inventory_item_id, self.items[1].id)
+        self.assertEqual(self.stock(), [5, 5])
+        self.assertFalse(StockReservation.objects.filter(order=self.order).exists())
+
+    def test_commit_after_cancel_does_not_take_stock_again(self):
+        reserve_stock(self.order, [(self.items[0].id, 2), (self.items[1].id, 1)])
+        self.assertEqual(self.stock(), [3, 4])
+        release_reservations(self.order)
+        self.assertEqual(self.stock(), [5, 5])
+        with self.assertRaises(InsufficientStock):
+            commit_reservations(self.order)
+        self.assertEqual(self.stock(), [5, 5])
+        self.assertFalse(
+            StockReservation.objects.filter(order=self.order, status=StockReservation.Status.COMMITTED).exists()
+        )
+
+    def test_commit_makes_held_stock_permanent(self):
+        reserve_stock(self.order, [(self.items[0].id, 2)])
+        commit_reservations(self.order)
+        self.assertEqual(self.stock(), [3, 5])
+        self.assertEqual(
+            list(StockReservation.objects.filter(order=self.order).values_list("status", flat=True)),
+            [StockReservation.Status.COMMITTED],
+        )
@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from delivery.models import Order, TrajectoryChunk
+from delivery.positions import TRAILS_DIRTY_KEY, connection, trail_key
+from delivery.tracking import ingest_rider_position
+from delivery.trajectories import decode_points, flush_trajectories
+
+from .factories import build_order, make_branch, make_customer, make_merchant, make_rider
+
+
+# A zero interval turns off the active-order cache and tracking pushes, so every ping sees current orders.
+@override_settings(TRACKING_POSITION_INTERVAL_SECONDS=0)
+class TrailAttributionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer()
+        cls.branch = make_branch(make_merchant())
+        cls.rider = make_rider()
+
+    def setUp(self):
+        redis = connection()
+        redis.delete(trail_key(self.rider.id), TRAILS_DIRTY_KEY)
+        self.addCleanup(redis.delete, trail_key(self.rider.id), TRAILS_DIRTY_KEY)
+        self.latitude = Decimal("37.770000")
+
+    def assign(self):
+        order = build_order(self.customer, self.branch, rider=self.rider, status=Order.Status.ASSIGNED)
+        order.save()
+        return order
+
+    def ping(self):
+        self.latitude += Decimal("0.001")
+        ingest_rider_position(self.rider.id, self.latitude, Decimal("-122.410000"))
+
+    def latitudes(self, order):
+        points = []
+        for chunk in TrajectoryChunk.objects.filter(rider=self.rider, order=order).order_by("started_at"):
+            points += decode_points(chunk.data, chunk.point_count)[:, 1].tolist()
+        return points
+
+    def test_points_keep_the_orders_active_when_recorded(self):
+        self.ping()
+        first = self.assign()
+        self.ping()
+        first.status = Order.Status.DELIVERED
+        first.save(update_fields=["status"])
+        self.ping()
+        second = self.assign()
+        self.ping()
+
+        # All four pings are flushed together, after the first order was delivered.
+        self.assertEqual(flush_trajectories(), 4)
+        self.assertEqual(self.latitudes(None), [37771000, 37773000])
+        self.assertEqual(self.latitudes(first), [37772000])
+        self.assertEqual(self.latitudes(second), [37774000])
+
+    def test_stacked_orders_each_get_the_point(self):
+        first, second = self.assign(), self.assign()
+        self.ping()
+        flush_trajectories()
+        self.assertEqual(self.latitudes(first), [37771000])
+        self.assertEqual(self.latitudes(second), [37771000])
+        self.assertEqual(self.latitudes(None), [])
@@ -0,0 +1,51 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from .dispatch import ACTIVE_STATUSES
+from .geoindex import update_rider_position
+from .models import Order
+from .positions import connection
+
+
+def active_order_ids(rider_id, timeout):
+    return cache.get_or_set(
+        f"tracking:rider:{rider_id}:orders",
+        lambda: list(Order.objects.filter(rider_id=rider_id, status__in=ACTIVE_STATUSES).values_list("id", flat=True)),
+        timeout=timeout,
+    )
+
+
+def publish_rider_position(rider_id, latitude, longitude, updated_at, order_ids):
+    """Push the rider's position to each of ``order_ids``' tracking groups, at most once per interval per order."""
+    interval = settings.TRACKING_POSITION_INTERVAL_SECONDS
+    if interval <= 0 or not order_ids:
+        return []
+    pipe = connection().pipeline(transaction=False)
+    for order_id in order_ids:
+        pipe.set(f"tracking:position:{order_id}", 1, nx=True, px=int(interval * 1000))
+    due = [order_id for order_id, opened in zip(order_ids, pipe.execute()) if opened]
+
+    channel_layer = get_channel_layer()
+    for order_id in due:
+        payload = {
+            "type": "rider_position",
+            "order_id": order_id,
+            "latitude": str(latitude),
+            "longitude": str(longitude),
+            "updated_at": updated_at.isoformat(),
+        }
+        async_to_sync(channel_layer.group_send)(
+            f"order_{order_id}_tracking",
+            {"type": "tracking.position", "payload": payload},
+        )
+    return due
+
+
+def ingest_rider_position(rider_id, latitude, longitude):
+    # Resolved per ping so trail points keep the orders that were active when recorded.
+    order_ids = active_order_ids(rider_id, settings.TRACKING_POSITION_INTERVAL_SECONDS)
+    updated_at = update_rider_position(rider_id, latitude, longitude, order_ids)
+    publish_rider_position(rider_id, latitude, longitude, updated_at, order_ids)
+    return updated_at
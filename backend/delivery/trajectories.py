@@ -0,0 +1,204 @@
+import json
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, RiderProfile, TrajectoryChunk
+from .positions import COORDINATE_SCALE, TRAILS_DIRTY_KEY, connection, trail_key
+
+FLUSH_LOCK_KEY = "trajectories:flushing"
+FLUSH_LOCK_SECONDS = 300
+COMPACT_BATCH_SIZE = 500
+
+
+def encode_points(points):
+    """Delta-encode ``(offset_ms, lat_e6, lon_e6)`` rows as column-major int32 and compress them."""
+    points = np.asarray(points, dtype=np.int64)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 3), dtype=np.int64))
+    return zlib.compress(np.ascontiguousarray(deltas.T, dtype="<i4").tobytes())
+
+
+def decode_points(data, count):
+    deltas = np.frombuffer(zlib.decompress(bytes(data)), dtype="<i4").reshape(3, count).T
+    return np.cumsum(deltas, axis=0, dtype=np.int64)
+
+
+def _store(chunk, points):
+    if chunk.point_count:
+        points = np.concatenate([decode_points(chunk.data, chunk.point_count), points])
+    points = points[np.argsort(points[:, 0], kind="stable")]
+    chunk.data = encode_points(points)
+    chunk.point_count = len(points)
+    chunk.ended_at = chunk.started_at + timedelta(milliseconds=int(points[-1, 0]))
+
+
+def _parse_trail(values):
+    """Group raw trail entries into ``{order_id: [(epoch_ms, lat_e6, lon_e6), ...]}``.
+
+    A point recorded while the rider had several active orders belongs to
+    each of them; one recorded with none goes under ``None``.
+    """
+    points = defaultdict(list)
+    for value in values:
+        parts = value.split(b"|")
+        order_ids = [int(order_id) for order_id in parts[3].split(b",")] if len(parts) > 3 and parts[3] else [None]
+        for order_id in order_ids:
+            points[order_id].append([int(part) for part in parts[:3]])
+    return points
+
+
+def _chunk_points(rider_id, order_id, points, span_ms):
+    points = np.array(points, dtype=np.int64)
+    buckets = points[:, 0] // span_ms
+    for bucket in np.unique(buckets).tolist():
+        started_ms = bucket * span_ms
+        bucket_points = points[buckets == bucket]
+        bucket_points[:, 0] -= started_ms
+        started_at = datetime.fromtimestamp(started_ms / 1000, tz=dt_timezone.utc)
+        yield (rider_id, order_id, started_at), bucket_points
+
+
+def _flush_trails(redis, rider_ids):
+    pipe = redis.pipeline(transaction=False)
+    for rider_id in rider_ids:
+        pipe.lrange(trail_key(rider_id), 0, -1)
+    trails = {rider_id: values for rider_id, values in zip(rider_ids, pipe.execute()) if values}
+    known = set(RiderProfile.objects.filter(id__in=trails).values_list("id", flat=True))
+    parsed = {rider_id: _parse_trail(trails[rider_id]) for rider_id in known}
+    # Orders deleted since the ping was recorded keep their points as unattributed.
+    existing = set(
+        Order.objects.filter(
+            id__in={order_id for points in parsed.values() for order_id in points if order_id is not None}
+        ).values_list("id", flat=True)
+    )
+
+    span_ms = settings.TRAJECTORY_CHUNK_SECONDS * 1000
+    pending = {}
+    for rider_id, by_order in parsed.items():
+        merged = defaultdict(list)
+        for order_id, points in by_order.items():
+            merged[order_id if order_id in existing else None].extend(points)
+        for order_id, points in merged.items():
+            for key, chunk_points in _chunk_points(rider_id, order_id, points, span_ms):
+                pending[key] = chunk_points
+
+    with transaction.atomic():
+        chunks = {
+            (chunk.rider_id, chunk.order_id, chunk.started_at): chunk
+            for chunk in TrajectoryChunk.objects.select_for_update().filter(
+                rider_id__in=known, started_at__in={started_at for _, _, started_at in pending}
+            )
+        }
+        updated, created = [], []
+        for (rider_id, order_id, started_at), points in pending.items():
+            chunk = chunks.get((rider_id, order_id, started_at))
+            if chunk is None:
+                chunk = TrajectoryChunk(rider_id=rider_id, order_id=order_id, started_at=started_at)
+                created.append(chunk)
+            else:
+                updated.append(chunk)
+            _store(chunk, points)
+        TrajectoryChunk.objects.bulk_update(updated, ["data", "point_count", "ended_at"])
+        TrajectoryChunk.objects.bulk_create(created)
+
+    # Trim only what was read; pings that arrived meanwhile stay queued.
+    pipe = redis.pipeline(transaction=False)
+    for rider_id, values in trails.items():
+        pipe.ltrim(trail_key(rider_id), len(values), -1)
+    pipe.execute()
+    return sum(len(values) for rider_id, values in trails.items() if rider_id in known)
+
+
+def flush_trajectories(batch_size=None):
+    """Move buffered trail points into per-rider, per-order chunks; returns the number of points stored."""
+    if batch_size is None:
+        batch_size = settings.RIDER_LOCATION_FLUSH_BATCH
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_SECONDS):
+        return 0
+    redis = connection()
+    flushed = 0
+    try:
+        while True:
+            popped = redis.spop(TRAILS_DIRTY_KEY, batch_size)
+            if not popped:
+                break
+            rider_ids = [int(rider_id) for rider_id in popped]
+            try:
+                flushed += _flush_trails(redis, rider_ids)
+            except Exception:
+                redis.sadd(TRAILS_DIRTY_KEY, *rider_ids)
+                raise
+            if len(rider_ids) < batch_size:
+                break
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return flushed
+
+
+def order_trajectory(order_id):
+    """Yield one list of ``[latitude, longitude, epoch_ms]`` points per stored chunk, in time order."""
+    chunks = (
+        TrajectoryChunk.objects.filter(order_id=order_id)
+        .order_by("started_at", "id")
+        .only("started_at", "point_count", "data")
+    )
+    for chunk in chunks.iterator():
+        base_ms = int(chunk.started_at.timestamp() * 1000)
+        yield [
+            [latitude / COORDINATE_SCALE, longitude / COORDINATE_SCALE, base_ms + offset]
+            for offset, latitude, longitude in decode_points(chunk.data, chunk.point_count).tolist()
+        ]
+
+
+def iter_trajectory_json(order_id):
+    yield f'{{"order_id": {int(order_id)}, "points": ['
+    separator = ""
+    for points in order_trajectory(order_id):
+        if points:
+            yield separator + json.dumps(points)[1:-1]
+            separator = ","
+    yield "]}"
+
+
+def _thin(points, step_ms):
+    slots = points[:, 0] // step_ms
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = slots[1:] != slots[:-1]
+    keep[-1] = True
+    return points[keep]
+
+
+def prune_trajectories(now=None):
+    """Drop chunks past retention and thin older chunks to one point per compaction step."""
+    if now is None:
+        now = timezone.now()
+    deleted, _ = TrajectoryChunk.objects.filter(
+        started_at__lt=now - timedelta(days=settings.TRAJECTORY_RETENTION_DAYS)
+    ).delete()
+
+    step_ms = settings.TRAJECTORY_COMPACT_SECONDS * 1000
+    stale = TrajectoryChunk.objects.filter(
+        is_compacted=False,
+        started_at__lt=now - timedelta(days=settings.TRAJECTORY_COMPACT_AFTER_DAYS),
+    ).only("id", "point_count", "data")
+    compacted = 0
+    batch = []
+    for chunk in stale.iterator(chunk_size=COMPACT_BATCH_SIZE):
+        points = _thin(decode_points(chunk.data, chunk.point_count), step_ms)
+        chunk.data = encode_points(points)
+        chunk.point_count = len(points)
+        chunk.is_compacted = True
+        batch.append(chunk)
+        if len(batch) >= COMPACT_BATCH_SIZE:
+            TrajectoryChunk.objects.bulk_update(batch, ["data", "point_count", "is_compacted"])
+            compacted += len(batch)
+            batch = []
+    TrajectoryChunk.objects.bulk_update(batch, ["data", "point_count", "is_compacted"])
+    compacted += len(batch)
+    return deleted, compacted
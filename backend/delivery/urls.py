@@ -10,6 +10,7 @@ from .views import (
     CustomerOrderQuoteView,
     CustomerOrderReorderView,
     CustomerOrderTrackingView,
+    CustomerOrderTrajectoryView,
     RiderAcceptOrderView,
     RiderAvailableOrdersView,
     RiderAvailabilityView,
@@ -23,9 +24,16 @@ from .views import (
     MerchantInventoryListCreateView,
     MerchantOrderListView,
     MerchantOrderStatusUpdateView,
+    AdminAnnouncementView,
+    NotificationListView,
+    NotificationMarkReadView,
+    NotificationUnreadCountView,
     AdminDeliveryFeeView,
     AdminOrderListView,
     AdminOrderReassignView,
+    AdminOrderTrajectoryView,
+    AdminOutboxMetricsView,
+    AdminRateCardView,
     AdminRiderKycUpdateView,
     AdminUserListView,
     AdminUserStatusUpdateView,
@@ -51,6 +59,11 @@ urlpatterns = [
         CustomerOrderTrackingView.as_view(),
         name="customer_order_tracking",
     ),
+    path(
+        "customer/orders/<int:order_id>/trajectory/",
+        CustomerOrderTrajectoryView.as_view(),
+        name="customer_order_trajectory",
+    ),
     path(
         "customer/orders/<int:order_id>/reorder/",
         CustomerOrderReorderView.as_view(),
@@ -107,5 +120,20 @@ urlpatterns = [
         AdminOrderReassignView.as_view(),
         name="admin_order_reassign",
     ),
+    path(
+        "admin/orders/<int:order_id>/trajectory/",
+        AdminOrderTrajectoryView.as_view(),
+        name="admin_order_trajectory",
+    ),
     path("admin/settings/delivery-fee/", AdminDeliveryFeeView.as_view(), name="admin_delivery_fee"),
+    path("admin/settings/rate-card/", AdminRateCardView.as_view(), name="admin_rate_card"),
+    path("admin/outbox/metrics/", AdminOutboxMetricsView.as_view(), name="admin_outbox_metrics"),
+    path("admin/announcements/", AdminAnnouncementView.as_view(), name="admin_announcements"),
+    path("notifications/", NotificationListView.as_view(), name="notifications"),
+    path(
+        "notifications/unread-count/",
+        NotificationUnreadCountView.as_view(),
+        name="notification_unread_count",
+    ),
+    path("notifications/mark-read/", NotificationMarkReadView.as_view(), name="notification_mark_read"),
 ]
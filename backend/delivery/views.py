@@ -1,8 +1,11 @@
+import json
 from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Count, Sum
+from django.db.models import Count, Q, Sum
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView
@@ -13,10 +16,16 @@ from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 
 from core.models import DeliverySetting
+from core.idempotency import idempotent
+from core.settings_cache import delivery_settings
+from .assignment import claim_order
+from .eta import estimate_delivery, estimate_order_delivery, eta_fields
+from .geoindex import nearby_open_orders, open_orders, sync_open_order, sync_rider
 from .models import (
     Address,
     ChatMessage,
     InventoryItem,
+    Notification,
     Order,
     OrderItem,
     OrderTrackingEvent,
@@ -24,14 +33,26 @@ from .models import (
     PaymentTransaction,
     RiderAvailability,
     RiderEarnings,
-    RiderLocation,
     RiderProfile,
 )
+from .notifications import mark_read, unread_count
+from .pagination import (
+    ChatCursorPagination,
+    EarningsCursorPagination,
+    NotificationCursorPagination,
+    OrderCursorPagination,
+)
 from .permissions import IsAdmin, IsCustomer, IsMerchant, IsRider
+from .outbox import enqueue_order_event, enqueue_order_events, outbox_status
+from .positions import rider_position
+from .quotes import sign_quote, snapshot_quote
+from .reservations import InsufficientStock, commit_reservations, release_reservations, reserve_stock
 from .serializers import (
     AddressSerializer,
+    AdminAnnouncementSerializer,
     AdminDeliveryFeeSerializer,
     AdminOrderReassignSerializer,
+    AdminRateCardSerializer,
     AdminRiderKycSerializer,
     AdminUserSerializer,
     AdminUserStatusSerializer,
@@ -39,6 +60,8 @@ from .serializers import (
     InventoryItemSerializer,
     MerchantBranchSerializer,
     MerchantOrderStatusSerializer,
+    NotificationMarkReadSerializer,
+    NotificationSerializer,
     OrderConfirmSerializer,
     OrderCreateSerializer,
     OrderQuoteRequestSerializer,
@@ -49,9 +72,13 @@ from .serializers import (
     RiderEarningsSerializer,
     RiderLocationSerializer,
     RiderStatusUpdateSerializer,
+    order_rows,
     prefetch_orders,
+    render_order_rows,
 )
-from .tasks import send_order_status_notifications, send_order_tracking_event
+from .tasks import broadcast_announcement
+from .tracking import ingest_rider_position
+from .trajectories import iter_trajectory_json
 
 
 def get_customer_profile(user):
@@ -72,6 +99,16 @@ def get_merchant_profile(user):
     raise ValueError("Merchant profile not found.")
 
 
+class OrderRowListMixin:
+    def list(self, request, *args, **kwargs):
+        fields = OrderSerializer.requested_fields(request)
+        queryset = order_rows(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(render_order_rows(queryset, fields))
+        return self.get_paginated_response(render_order_rows(page, fields))
+
+
 class CustomerAddressListCreateView(ListCreateAPIView):
     serializer_class = AddressSerializer
     permission_classes = [IsAuthenticated, IsCustomer]
@@ -118,6 +155,8 @@ class CustomerOrderQuoteView(APIView):
             "subtotal": str(quote["subtotal"]),
             "delivery_fee": str(quote["delivery_fee"]),
             "total": str(quote["total"]),
+            "quote_token": sign_quote(snapshot_quote(quote, customer, serializer.validated_data["vehicle_type"])),
+            **eta_fields(estimate_delivery(quote["branch"].id)),
         }
         return Response(payload, status=status.HTTP_200_OK)
 
@@ -126,6 +165,7 @@ class CustomerOrderCreateView(APIView):
     permission_classes = [IsAuthenticated, IsCustomer]
     throttle_scope = "order_create"
 
+    @idempotent
     @transaction.atomic
     def post(self, request, *args, **kwargs):
         serializer = OrderCreateSerializer(data=request.data)
@@ -134,14 +174,14 @@ class CustomerOrderCreateView(APIView):
         order = serializer.create_order(customer)
         event = OrderTrackingEvent.objects.filter(order=order).order_by("-created_at").first()
         if event:
-            send_order_tracking_event.delay(order.id, event.id)
-            send_order_status_notifications.delay(order.id, event.status)
+            enqueue_order_event(event)
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
 
 class CustomerOrderConfirmView(APIView):
     permission_classes = [IsAuthenticated, IsCustomer]
 
+    @idempotent
     @transaction.atomic
     def post(self, request, order_id, *args, **kwargs):
         order = get_object_or_404(Order, id=order_id)
@@ -154,6 +194,10 @@ class CustomerOrderConfirmView(APIView):
         payment = getattr(order, "payment", None)
         if not payment:
             return Response({"detail": "Payment record missing."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            commit_reservations(order)
+        except InsufficientStock:
+            return Response({"detail": "Some items are out of stock."}, status=status.HTTP_409_CONFLICT)
 
         payment.status = "CONFIRMED"
         payment.save(update_fields=["status"])
@@ -166,20 +210,21 @@ class CustomerOrderConfirmView(APIView):
 
         order.status = Order.Status.CONFIRMED
         order.save(update_fields=["status"])
+        transaction.on_commit(lambda: sync_open_order(order))
         event = OrderTrackingEvent.objects.create(order=order, status=Order.Status.CONFIRMED)
-        send_order_tracking_event.delay(order.id, event.id)
-        send_order_status_notifications.delay(order.id, event.status)
+        enqueue_order_event(event)
 
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 
-class CustomerOrderListView(ListAPIView):
+class CustomerOrderListView(OrderRowListMixin, ListAPIView):
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
     permission_classes = [IsAuthenticated, IsCustomer]
 
     def get_queryset(self):
         customer = get_customer_profile(self.request.user)
-        return prefetch_orders(Order.objects.filter(customer=customer).order_by("-created_at"))
+        return Order.objects.filter(customer=customer).order_by("-created_at")
 
 
 class CustomerOrderTrackingView(APIView):
@@ -187,21 +232,33 @@ class CustomerOrderTrackingView(APIView):
 
     def get(self, request, order_id, *args, **kwargs):
         customer = get_customer_profile(request.user)
-        order = get_object_or_404(Order, id=order_id, customer=customer)
-        events = OrderTrackingEvent.objects.filter(order=order).order_by("created_at")
+        fields = OrderSerializer.requested_fields(request)
+        order = get_object_or_404(prefetch_orders(Order.objects.all(), fields), id=order_id, customer=customer)
+        events = list(OrderTrackingEvent.objects.filter(order=order).order_by("created_at"))
         return Response(
             {
-                "order": OrderSerializer(order).data,
+                "order": OrderSerializer(order, context={"request": request}).data,
                 "events": OrderTrackingEventSerializer(events, many=True).data,
+                **eta_fields(estimate_order_delivery(order, events)),
             },
             status=status.HTTP_200_OK,
         )
 
 
+class CustomerOrderTrajectoryView(APIView):
+    permission_classes = [IsAuthenticated, IsCustomer]
+
+    def get(self, request, order_id, *args, **kwargs):
+        customer = get_customer_profile(request.user)
+        order = get_object_or_404(Order, id=order_id, customer=customer)
+        return StreamingHttpResponse(iter_trajectory_json(order.id), content_type="application/json")
+
+
 class CustomerOrderReorderView(APIView):
     permission_classes = [IsAuthenticated, IsCustomer]
     throttle_scope = "order_create"
 
+    @idempotent
     @transaction.atomic
     def post(self, request, order_id, *args, **kwargs):
         customer = get_customer_profile(request.user)
@@ -235,8 +292,7 @@ class CustomerOrderReorderView(APIView):
         )
 
         event = OrderTrackingEvent.objects.create(order=order, status=Order.Status.CREATED)
-        send_order_tracking_event.delay(order.id, event.id)
-        send_order_status_notifications.delay(order.id, event.status)
+        enqueue_order_event(event)
 
         OrderItem.objects.bulk_create(
             [
@@ -250,6 +306,13 @@ class CustomerOrderReorderView(APIView):
                 for item in original.items.all()
             ]
         )
+        try:
+            reserve_stock(
+                order,
+                [(item.inventory_item_id, item.quantity) for item in original.items.all() if item.inventory_item_id],
+            )
+        except InsufficientStock:
+            raise ValidationError({"items": "Some items are out of stock."})
 
         Payment.objects.create(
             order=order,
@@ -263,6 +326,7 @@ class CustomerOrderReorderView(APIView):
 
 class CustomerOrderChatListView(ListAPIView):
     serializer_class = ChatMessageSerializer
+    pagination_class = ChatCursorPagination
     permission_classes = [IsAuthenticated, IsCustomer]
 
     def get_queryset(self):
@@ -287,40 +351,65 @@ class RiderAvailabilityView(APIView):
         serializer = RiderAvailabilitySerializer(availability, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        sync_rider(rider, availability=availability)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class RiderAvailableOrdersView(ListAPIView):
-    serializer_class = OrderSerializer
+class RiderAvailableOrdersView(APIView):
     permission_classes = [IsAuthenticated, IsRider]
 
-    def get_queryset(self):
-        rider = get_rider_profile(self.request.user)
+    def get(self, request, *args, **kwargs):
+        rider = get_rider_profile(request.user)
         availability = RiderAvailability.objects.filter(rider=rider).first()
         if not availability or not availability.is_online:
-            return Order.objects.none()
-        return prefetch_orders(
-            Order.objects.filter(status=Order.Status.CONFIRMED, rider__isnull=True).order_by("-created_at")
-        )
+            return Response([], status=status.HTTP_200_OK)
+        fields = OrderSerializer.requested_fields(request)
+        open_queryset = Order.objects.filter(status=Order.Status.CONFIRMED, rider__isnull=True)
+        position = rider_position(rider.id)
+
+        ranked = {}
+        rows = []
+        if position is not None:
+            ranked = dict(nearby_open_orders(position[0], position[1]))
+            rows = list(order_rows(open_queryset.filter(id__in=list(ranked)), fields))
+            stale = set(ranked) - {row["id"] for row in rows}
+            if stale:
+                open_orders.remove(*stale)
+            rows.sort(key=lambda row: ranked[row["id"]])
+
+        # Orders that cannot be ranked follow, newest first: all of them when the
+        # rider's position is unknown, otherwise those without pickup coordinates,
+        # which are never in the geo index.
+        remaining = settings.RIDER_FEED_MAX_ORDERS - len(rows)
+        if remaining > 0:
+            unranked = open_queryset
+            if position is not None:
+                unranked = unranked.filter(Q(pickup_latitude__isnull=True) | Q(pickup_longitude__isnull=True))
+            rows += list(order_rows(unranked.order_by("-created_at", "-id"), fields)[:remaining])
+
+        payload = render_order_rows(rows, fields)
+        for data, row in zip(payload, rows):
+            distance = ranked.get(row["id"])
+            data["pickup_distance_km"] = None if distance is None else round(distance, 3)
+        return Response(payload, status=status.HTTP_200_OK)
 
 
 class RiderAcceptOrderView(APIView):
     permission_classes = [IsAuthenticated, IsRider]
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
         serializer = RiderAcceptOrderSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         rider = get_rider_profile(request.user)
-        order = Order.objects.select_for_update().get(id=serializer.validated_data["order_id"])
-        if order.status != Order.Status.CONFIRMED or order.rider_id is not None:
+        order_id = serializer.validated_data["order_id"]
+        with transaction.atomic():
+            event_id = claim_order(order_id, rider)
+            if event_id is not None:
+                enqueue_order_events([event_id])
+        if event_id is None:
             return Response({"detail": "Order is no longer available."}, status=status.HTTP_409_CONFLICT)
-        order.rider = rider
-        order.status = Order.Status.ASSIGNED
-        order.save(update_fields=["rider", "status"])
-        event = OrderTrackingEvent.objects.create(order=order, status=Order.Status.ASSIGNED)
-        send_order_tracking_event.delay(order.id, event.id)
-        send_order_status_notifications.delay(order.id, event.status)
+        open_orders.remove(order_id)
+        order = prefetch_orders(Order.objects.all()).get(id=order_id)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 
@@ -342,8 +431,7 @@ class RiderOrderStatusUpdateView(APIView):
             latitude=serializer.validated_data.get("latitude"),
             longitude=serializer.validated_data.get("longitude"),
         )
-        send_order_tracking_event.delay(order.id, event.id)
-        send_order_status_notifications.delay(order.id, event.status)
+        enqueue_order_event(event)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 
@@ -351,16 +439,17 @@ class RiderLocationUpdateView(APIView):
     permission_classes = [IsAuthenticated, IsRider]
 
     def post(self, request, *args, **kwargs):
-        rider = get_rider_profile(request.user)
-        location, _ = RiderLocation.objects.get_or_create(rider=rider)
-        serializer = RiderLocationSerializer(location, data=request.data, partial=True)
+        serializer = RiderLocationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        rider = get_rider_profile(request.user)
+        position = dict(serializer.validated_data)
+        position["updated_at"] = ingest_rider_position(rider.id, position["latitude"], position["longitude"])
+        return Response(RiderLocationSerializer(position).data, status=status.HTTP_200_OK)
 
 
 class RiderEarningsListView(ListAPIView):
     serializer_class = RiderEarningsSerializer
+    pagination_class = EarningsCursorPagination
     permission_classes = [IsAuthenticated, IsRider]
 
     def get_queryset(self):
@@ -415,15 +504,19 @@ class MerchantInventoryDetailView(RetrieveUpdateDestroyAPIView):
         return InventoryItem.objects.filter(branch__merchant=merchant)
 
 
-class MerchantOrderListView(ListAPIView):
+class MerchantOrderListView(OrderRowListMixin, ListAPIView):
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
     permission_classes = [IsAuthenticated, IsMerchant]
 
     def get_queryset(self):
         merchant = get_merchant_profile(self.request.user)
-        return prefetch_orders(
-            Order.objects.filter(merchant_branch__merchant=merchant).order_by("-created_at")
-        )
+        # Filtering on branch ids rather than joining to the merchant lets the
+        # (merchant_branch, -created_at, -id) index serve the page. With several
+        # branches Postgres cannot merge the per-branch ranges in order, so it
+        # walks (-created_at, -id) and filters on branch instead; still no sort.
+        branch_ids = list(merchant.branches.values_list("id", flat=True))
+        return Order.objects.filter(merchant_branch_id__in=branch_ids).order_by("-created_at")
 
 
 class MerchantOrderStatusUpdateView(APIView):
@@ -439,11 +532,18 @@ class MerchantOrderStatusUpdateView(APIView):
         )
         serializer = MerchantOrderStatusSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        if serializer.validated_data["status"] == Order.Status.CANCELED:
+            release_reservations(order)
+        else:
+            try:
+                commit_reservations(order)
+            except InsufficientStock:
+                return Response({"detail": "Some items are out of stock."}, status=status.HTTP_409_CONFLICT)
         order.status = serializer.validated_data["status"]
         order.save(update_fields=["status"])
+        transaction.on_commit(lambda: sync_open_order(order))
         event = OrderTrackingEvent.objects.create(order=order, status=order.status)
-        send_order_tracking_event.delay(order.id, event.id)
-        send_order_status_notifications.delay(order.id, event.status)
+        enqueue_order_event(event)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 
@@ -486,7 +586,7 @@ class AdminUserListView(ListAPIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get_queryset(self):
-        queryset = get_user_model().objects.order_by("id")
+        queryset = get_user_model().objects.select_related("riderprofile").order_by("id")
         role = self.request.query_params.get("role")
         if role:
             queryset = queryset.filter(role=role)
@@ -514,15 +614,17 @@ class AdminRiderKycUpdateView(APIView):
         serializer.is_valid(raise_exception=True)
         rider.kyc_status = serializer.validated_data["kyc_status"]
         rider.save(update_fields=["kyc_status"])
+        sync_rider(rider)
         return Response({"id": rider.id, "kyc_status": rider.kyc_status}, status=status.HTTP_200_OK)
 
 
-class AdminOrderListView(ListAPIView):
+class AdminOrderListView(OrderRowListMixin, ListAPIView):
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get_queryset(self):
-        return prefetch_orders(Order.objects.all().order_by("-created_at"))
+        return Order.objects.all().order_by("-created_at")
 
 
 class AdminOrderReassignView(APIView):
@@ -539,18 +641,44 @@ class AdminOrderReassignView(APIView):
         order.rider = rider
         order.status = Order.Status.ASSIGNED
         order.save(update_fields=["rider", "status"])
+        transaction.on_commit(lambda: open_orders.remove(order.id))
         event = OrderTrackingEvent.objects.create(order=order, status=Order.Status.ASSIGNED)
-        send_order_tracking_event.delay(order.id, event.id)
-        send_order_status_notifications.delay(order.id, event.status)
+        enqueue_order_event(event)
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 
+class AdminOrderTrajectoryView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, order_id, *args, **kwargs):
+        order = get_object_or_404(Order, id=order_id)
+        return StreamingHttpResponse(iter_trajectory_json(order.id), content_type="application/json")
+
+
+class AdminRateCardView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        value = delivery_settings.get(DeliverySetting.Keys.RATE_CARD)
+        rate_card = json.loads(value) if value else None
+        return Response({"rate_card": rate_card}, status=status.HTTP_200_OK)
+
+    def post(self, request, *args, **kwargs):
+        serializer = AdminRateCardSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rate_card = serializer.data
+        DeliverySetting.objects.update_or_create(
+            key=DeliverySetting.Keys.RATE_CARD,
+            defaults={"value": json.dumps(rate_card)},
+        )
+        return Response({"rate_card": rate_card}, status=status.HTTP_200_OK)
+
+
 class AdminDeliveryFeeView(APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
 
     def get(self, request, *args, **kwargs):
-        setting = DeliverySetting.objects.filter(key=DeliverySetting.Keys.DELIVERY_FEE_FLAT).first()
-        value = setting.value if setting else None
+        value = delivery_settings.get(DeliverySetting.Keys.DELIVERY_FEE_FLAT)
         return Response({"delivery_fee": value}, status=status.HTTP_200_OK)
 
     def post(self, request, *args, **kwargs):
@@ -564,3 +692,52 @@ class AdminDeliveryFeeView(APIView):
         setting.value = str(fee_value)
         setting.save(update_fields=["value"])
         return Response({"delivery_fee": str(fee_value)}, status=status.HTTP_200_OK)
+
+
+class AdminOutboxMetricsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return Response(outbox_status(), status=status.HTTP_200_OK)
+
+
+class AdminAnnouncementView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def post(self, request, *args, **kwargs):
+        serializer = AdminAnnouncementSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        broadcast_announcement.delay(serializer.validated_data["title"], serializer.validated_data["body"])
+        return Response({"detail": "Announcement queued."}, status=status.HTTP_202_ACCEPTED)
+
+
+class NotificationListView(ListAPIView):
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationCursorPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get("unread") in ("1", "true"):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+
+class NotificationUnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"unread_count": unread_count(request.user.id)}, status=status.HTTP_200_OK)
+
+
+class NotificationMarkReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user, serializer.validated_data.get("ids"))
+        return Response(
+            {"updated": updated, "unread_count": unread_count(request.user.id)},
+            status=status.HTTP_200_OK,
+        )
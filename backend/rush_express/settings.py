@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
 
+from corsheaders.defaults import default_headers
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "insecure-dev-key")
@@ -115,6 +117,9 @@ REST_FRAMEWORK = {
     },
 }
 
+API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", "200"))
+
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
     "ROTATE_REFRESH_TOKENS": True,
@@ -122,11 +127,98 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = os.environ.get("CORS_ALLOW_ALL_ORIGINS", "true").lower() == "true"
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/1")
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
 
+DISPATCH_ENABLED = os.environ.get("DISPATCH_ENABLED", "true").lower() == "true"
+DISPATCH_INTERVAL_SECONDS = float(os.environ.get("DISPATCH_INTERVAL_SECONDS", "5"))
+DISPATCH_LOCK_SECONDS = int(os.environ.get("DISPATCH_LOCK_SECONDS", "60"))
+DISPATCH_MAX_BATCH = int(os.environ.get("DISPATCH_MAX_BATCH", "5000"))
+DISPATCH_MAX_PICKUP_KM = float(os.environ.get("DISPATCH_MAX_PICKUP_KM", "5"))
+
+RIDER_LOCATION_FLUSH_SECONDS = float(os.environ.get("RIDER_LOCATION_FLUSH_SECONDS", "10"))
+RIDER_LOCATION_FLUSH_BATCH = int(os.environ.get("RIDER_LOCATION_FLUSH_BATCH", "1000"))
+RIDER_LOCATION_SOCKET_FLUSH_SECONDS = float(os.environ.get("RIDER_LOCATION_SOCKET_FLUSH_SECONDS", "2"))
+TRACKING_POSITION_INTERVAL_SECONDS = float(os.environ.get("TRACKING_POSITION_INTERVAL_SECONDS", "5"))
+
+TRAJECTORY_CHUNK_SECONDS = int(os.environ.get("TRAJECTORY_CHUNK_SECONDS", "600"))
+TRAJECTORY_COMPACT_AFTER_DAYS = int(os.environ.get("TRAJECTORY_COMPACT_AFTER_DAYS", "7"))
+TRAJECTORY_COMPACT_SECONDS = int(os.environ.get("TRAJECTORY_COMPACT_SECONDS", "15"))
+TRAJECTORY_RETENTION_DAYS = int(os.environ.get("TRAJECTORY_RETENTION_DAYS", "90"))
+
+ETA_LOOKBACK_DAYS = int(os.environ.get("ETA_LOOKBACK_DAYS", "28"))
+ETA_MIN_SAMPLES = int(os.environ.get("ETA_MIN_SAMPLES", "5"))
+ETA_MAX_LEG_MINUTES = int(os.environ.get("ETA_MAX_LEG_MINUTES", "240"))
+ETA_FIT_SECONDS = float(os.environ.get("ETA_FIT_SECONDS", "3600"))
+ETA_RELOAD_SECONDS = float(os.environ.get("ETA_RELOAD_SECONDS", "60"))
+
+STOCK_RESERVATION_TTL_SECONDS = int(os.environ.get("STOCK_RESERVATION_TTL_SECONDS", "900"))
+STOCK_RESERVATION_SWEEP_SECONDS = int(os.environ.get("STOCK_RESERVATION_SWEEP_SECONDS", "60"))
+STOCK_RESERVATION_SWEEP_BATCH = int(os.environ.get("STOCK_RESERVATION_SWEEP_BATCH", "500"))
+
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", "0.25"))
+OUTBOX_METRICS_SECONDS = float(os.environ.get("OUTBOX_METRICS_SECONDS", "30"))
+
+NOTIFICATION_BATCH_SIZE = int(os.environ.get("NOTIFICATION_BATCH_SIZE", "2000"))
+NOTIFICATION_SEND_CONCURRENCY = int(os.environ.get("NOTIFICATION_SEND_CONCURRENCY", "100"))
+NOTIFICATION_UNREAD_TTL_SECONDS = int(os.environ.get("NOTIFICATION_UNREAD_TTL_SECONDS", "86400"))
+
+PARTITION_PREMAKE_MONTHS = int(os.environ.get("PARTITION_PREMAKE_MONTHS", "3"))
+PARTITION_ARCHIVE_DIR = os.environ.get("PARTITION_ARCHIVE_DIR", os.path.join(BASE_DIR, "archive"))
+TRACKING_EVENT_RETENTION_MONTHS = int(os.environ.get("TRACKING_EVENT_RETENTION_MONTHS", "13"))
+NOTIFICATION_RETENTION_MONTHS = int(os.environ.get("NOTIFICATION_RETENTION_MONTHS", "6"))
+CHAT_MESSAGE_RETENTION_MONTHS = int(os.environ.get("CHAT_MESSAGE_RETENTION_MONTHS", "13"))
+
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-orders": {
+        "task": "delivery.tasks.dispatch_orders",
+        "schedule": DISPATCH_INTERVAL_SECONDS,
+        "options": {"expires": DISPATCH_INTERVAL_SECONDS},
+    },
+    "flush-rider-locations": {
+        "task": "delivery.tasks.flush_rider_locations",
+        "schedule": RIDER_LOCATION_FLUSH_SECONDS,
+        "options": {"expires": RIDER_LOCATION_FLUSH_SECONDS},
+    },
+    "flush-rider-trajectories": {
+        "task": "delivery.tasks.flush_rider_trajectories",
+        "schedule": RIDER_LOCATION_FLUSH_SECONDS,
+        "options": {"expires": RIDER_LOCATION_FLUSH_SECONDS},
+    },
+    "prune-rider-trajectories": {
+        "task": "delivery.tasks.prune_rider_trajectories",
+        "schedule": 3600,
+    },
+    "fit-eta-model": {
+        "task": "delivery.tasks.fit_eta_model",
+        "schedule": ETA_FIT_SECONDS,
+    },
+    "release-stock-reservations": {
+        "task": "delivery.tasks.release_stock_reservations",
+        "schedule": STOCK_RESERVATION_SWEEP_SECONDS,
+        "options": {"expires": STOCK_RESERVATION_SWEEP_SECONDS},
+    },
+    "purge-idempotency-keys": {
+        "task": "core.tasks.purge_idempotency_keys",
+        "schedule": 3600,
+    },
+    "create-table-partitions": {
+        "task": "delivery.tasks.create_table_partitions",
+        "schedule": 86400,
+    },
+    "archive-table-partitions": {
+        "task": "delivery.tasks.archive_table_partitions",
+        "schedule": 86400,
+    },
+}
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -135,6 +227,14 @@ CACHES = {
     }
 }
 
+SETTINGS_CACHE_VERSION_CHECK_SECONDS = float(os.environ.get("SETTINGS_CACHE_VERSION_CHECK_SECONDS", "30"))
+SETTINGS_CACHE_RETRY_SECONDS = float(os.environ.get("SETTINGS_CACHE_RETRY_SECONDS", "5"))
+QUOTE_TOKEN_MAX_AGE_SECONDS = int(os.environ.get("QUOTE_TOKEN_MAX_AGE_SECONDS", "300"))
+
+RIDER_SEARCH_RADIUS_KM = float(os.environ.get("RIDER_SEARCH_RADIUS_KM", "3"))
+RIDER_FEED_RADIUS_KM = float(os.environ.get("RIDER_FEED_RADIUS_KM", "5"))
+RIDER_FEED_MAX_ORDERS = int(os.environ.get("RIDER_FEED_MAX_ORDERS", "50"))
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -81,7 +81,8 @@ class ApiClient {
       );
     });
     if (response.statusCode >= 200 && response.statusCode < 300) {
-      final decoded = jsonDecode(response.body) as List<dynamic>;
+      final page = jsonDecode(response.body) as Map<String, dynamic>;
+      final decoded = page['results'] as List<dynamic>? ?? [];
       return decoded.map((item) => Order.fromJson(item as Map<String, dynamic>)).toList();
     }
     throw Exception('Failed to load orders');
@@ -4,6 +4,7 @@ import type {
   ApiError,
   AuthResponse,
   AuthTokens,
+  CursorPage,
   DeliveryFeeSetting,
   Order,
   User,
@@ -138,7 +139,8 @@ class ApiClient {
     const response = await fetch(`${this.baseUrl}/api/admin/orders/`, {
       headers: this.buildHeaders(),
     });
-    return handleResponse<Order[]>(response);
+    const page = await handleResponse<CursorPage<Order>>(response);
+    return page.results;
   }
 
   async reassignOrder(orderId: number, riderId: number): Promise<Order> {
@@ -48,6 +48,9 @@ describe("CustomerDashboard order flow", () => {
       subtotal: "4.00",
       delivery_fee: "5.00",
       total: "9.00",
+      quote_token: "signed-quote",
+      eta_minutes: null,
+      estimated_delivery_at: null,
     };
 
     const order: Order = {
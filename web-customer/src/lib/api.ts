@@ -5,9 +5,10 @@ import type {
   AuthResponse,
   AuthTokens,
   ChatMessage,
+  CursorPage,
   Order,
   OrderQuote,
-  OrderTrackingEvent,
+  OrderTracking,
   User,
 } from "@/lib/types";
 
@@ -161,6 +162,7 @@ class ApiClient {
     dropoff_address_id: number;
     items: { inventory_item_id: number; quantity: number }[];
     payment_provider: string;
+    quote_token?: string;
   }): Promise<Order> {
     const response = await fetch(`${this.baseUrl}/api/customer/orders/`, {
       method: "POST",
@@ -183,7 +185,8 @@ class ApiClient {
     const response = await fetch(`${this.baseUrl}/api/customer/orders/history/`, {
       headers: this.buildHeaders(),
     });
-    return handleResponse<Order[]>(response);
+    const page = await handleResponse<CursorPage<Order>>(response);
+    return page.results;
   }
 
   async reorder(orderId: number): Promise<Order> {
@@ -194,18 +197,19 @@ class ApiClient {
     return handleResponse<Order>(response);
   }
 
-  async getTracking(orderId: number): Promise<{ order: Order; events: OrderTrackingEvent[] }> {
+  async getTracking(orderId: number): Promise<OrderTracking> {
     const response = await fetch(`${this.baseUrl}/api/customer/orders/${orderId}/tracking/`, {
       headers: this.buildHeaders(),
     });
-    return handleResponse<{ order: Order; events: OrderTrackingEvent[] }>(response);
+    return handleResponse<OrderTracking>(response);
   }
 
   async getChat(orderId: number): Promise<ChatMessage[]> {
     const response = await fetch(`${this.baseUrl}/api/customer/orders/${orderId}/chat/`, {
       headers: this.buildHeaders(),
     });
-    return handleResponse<ChatMessage[]>(response);
+    const page = await handleResponse<CursorPage<ChatMessage>>(response);
+    return page.results;
   }
 }
 
@@ -36,6 +36,12 @@ export interface ApiError {
   details?: Record<string, unknown>;
 }
 
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 export interface Address {
   id: number;
   label: string;
@@ -57,6 +63,21 @@ export interface OrderTrackingEvent {
   created_at: string;
 }
 
+export interface OrderTracking {
+  order: Order;
+  events: OrderTrackingEvent[];
+  eta_minutes: number | null;
+  estimated_delivery_at: string | null;
+}
+
+export interface RiderPosition {
+  type: "rider_position";
+  order_id: number;
+  latitude: string;
+  longitude: string;
+  updated_at: string;
+}
+
 export interface OrderItem {
   id: number;
   name: string;
@@ -108,6 +129,9 @@ export interface OrderQuote {
   subtotal: string;
   delivery_fee: string;
   total: string;
+  quote_token: string;
+  eta_minutes: number | null;
+  estimated_delivery_at: string | null;
 }
 
 export interface ChatMessage {
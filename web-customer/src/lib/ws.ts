@@ -1,4 +1,4 @@
-import type { OrderTrackingEvent } from "@/lib/types";
+import type { OrderTrackingEvent, RiderPosition } from "@/lib/types";
 
 const WS_BASE_URL = (import.meta.env.VITE_WS_URL ?? "ws://localhost:8000").replace(/\/$/, "");
 
@@ -13,10 +13,18 @@ export const connectNotifications = (token: string, onMessage: MessageHandler<un
 export const connectOrderTracking = (
   token: string,
   orderId: number,
-  onMessage: MessageHandler<OrderTrackingEvent>
+  onMessage: MessageHandler<OrderTrackingEvent>,
+  onPosition?: MessageHandler<RiderPosition>
 ) => {
   const socket = new WebSocket(`${WS_BASE_URL}/ws/orders/${orderId}/tracking/?token=${token}`);
-  socket.onmessage = (event) => onMessage(JSON.parse(event.data) as OrderTrackingEvent);
+  socket.onmessage = (event) => {
+    const payload = JSON.parse(event.data);
+    if (payload.type === "rider_position") {
+      onPosition?.(payload as RiderPosition);
+      return;
+    }
+    onMessage(payload as OrderTrackingEvent);
+  };
   return socket;
 };
 
@@ -10,7 +10,7 @@ import { LoadingState, EmptyState } from "@/components/State";
 import { apiClient } from "@/lib/api";
 import { useAuthStore } from "@/lib/auth";
 import { connectNotifications, connectOrderChat, connectOrderTracking } from "@/lib/ws";
-import type { Address, ChatMessage, Order, OrderQuote, OrderTrackingEvent } from "@/lib/types";
+import type { Address, ChatMessage, Order, OrderQuote, OrderTrackingEvent, RiderPosition } from "@/lib/types";
 import { cn } from "@/lib/utils";
 import {
   Package,
@@ -36,6 +36,8 @@ const CustomerDashboard = () => {
   const [addresses, setAddresses] = useState<Address[]>([]);
   const [orders, setOrders] = useState<Order[]>([]);
   const [trackingEvents, setTrackingEvents] = useState<OrderTrackingEvent[]>([]);
+  const [riderPosition, setRiderPosition] = useState<RiderPosition | null>(null);
+  const [etaMinutes, setEtaMinutes] = useState<number | null>(null);
   const [chatMessages, setChatMessages] = useState<ChatMessage[]>([]);
   const [selectedOrderId, setSelectedOrderId] = useState<number | null>(null);
 
@@ -107,6 +109,7 @@ const CustomerDashboard = () => {
     const loadTracking = async () => {
       const response = await apiClient.getTracking(selectedOrderId);
       setTrackingEvents(response.events);
+      setEtaMinutes(response.eta_minutes ?? null);
     };
     const loadChat = async () => {
       const data = await apiClient.getChat(selectedOrderId);
@@ -118,9 +121,15 @@ const CustomerDashboard = () => {
 
   useEffect(() => {
     if (!tokens?.access || !selectedOrderId) return;
-    const trackingSocket = connectOrderTracking(tokens.access, selectedOrderId, (event) => {
-      setTrackingEvents((prev) => [...prev, event]);
-    });
+    setRiderPosition(null);
+    const trackingSocket = connectOrderTracking(
+      tokens.access,
+      selectedOrderId,
+      (event) => {
+        setTrackingEvents((prev) => [...prev, event]);
+      },
+      setRiderPosition
+    );
     return () => trackingSocket.close();
   }, [tokens?.access, selectedOrderId]);
 
@@ -176,6 +185,7 @@ const CustomerDashboard = () => {
           quantity: item.quantity,
         })),
         payment_provider: orderForm.payment_provider,
+        quote_token: quote.quote_token,
       });
       const confirmed = await apiClient.confirmOrder(order.id, "TEST_CONFIRM");
       setOrders((prev) => [confirmed, ...prev]);
@@ -364,6 +374,7 @@ const CustomerDashboard = () => {
                     <div>Subtotal: ${quote.subtotal}</div>
                     <div>Delivery fee: ${quote.delivery_fee}</div>
                     <div>Total: ${quote.total}</div>
+                    {quote.eta_minutes !== null ? <div>Estimated delivery: {quote.eta_minutes} min</div> : null}
                   </div>
                 </div>
               ) : null}
@@ -480,7 +491,18 @@ const CustomerDashboard = () => {
                   <div className="flex items-center gap-2">
                     <Package className="h-4 w-4 text-primary" />
                     <span className="text-sm font-semibold">Order #{selectedOrder.id}</span>
+                    {etaMinutes !== null ? (
+                      <Badge variant="outline">ETA {etaMinutes} min</Badge>
+                    ) : null}
                   </div>
+                  {riderPosition ? (
+                    <div className="rounded-lg border border-border/60 p-4 text-xs text-muted-foreground">
+                      <p className="mb-1">Rider location</p>
+                      <div>
+                        {riderPosition.latitude}, {riderPosition.longitude} · {riderPosition.updated_at}
+                      </div>
+                    </div>
+                  ) : null}
                   <div className="rounded-lg border border-border/60 p-4">
                     <p className="text-xs text-muted-foreground mb-2">Tracking timeline</p>
                     <div className="space-y-2">
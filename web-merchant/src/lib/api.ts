@@ -3,6 +3,7 @@ import type {
   ApiError,
   AuthResponse,
   AuthTokens,
+  CursorPage,
   InventoryItem,
   MerchantAnalytics,
   MerchantBranch,
@@ -181,7 +182,8 @@ class ApiClient {
     const response = await fetch(`${this.baseUrl}/api/merchant/orders/`, {
       headers: this.buildHeaders(),
     });
-    return handleResponse<Order[]>(response);
+    const page = await handleResponse<CursorPage<Order>>(response);
+    return page.results;
   }
 
   async updateOrderStatus(orderId: number, status: string): Promise<Order> {
@@ -36,6 +36,12 @@ export interface ApiError {
   details?: Record<string, unknown>;
 }
 
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 export interface Address {
   id: number;
   label: string;
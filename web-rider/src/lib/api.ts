@@ -3,6 +3,7 @@ import type {
   ApiError,
   AuthResponse,
   AuthTokens,
+  CursorPage,
   Order,
   RiderAvailability,
   RiderEarnings,
@@ -167,7 +168,8 @@ class ApiClient {
     const response = await fetch(`${this.baseUrl}/api/rider/earnings/`, {
       headers: this.buildHeaders(),
     });
-    return handleResponse<RiderEarnings[]>(response);
+    const page = await handleResponse<CursorPage<RiderEarnings>>(response);
+    return page.results;
   }
 }
 